@@ -1,85 +1,22 @@
-import streamlit as st
-import pandas as pd
-import plotly.graph_objs as go
-import numpy as np
-from prophet import Prophet
-from datetime import datetime, timedelta
-
-
-# ---------------------------
-# Dummy Model
-# ---------------------------
-
-class DummySalesModel:
-    def predict(self, X):
-        base = X[:, 0]          # current sales
-        noise = np.random.normal(0, 2, size=len(X))
-        return base * 0.8 + noise
-
-# ---------------------------
-# Predictive AI (Prophet)
-# ---------------------------
-
+import time
 
-def get_prediction(df):
-    data = df.copy()
-    # normalize column names (strip spaces)
-    data.columns = data.columns.str.strip()
-
-    # ensure types
-    data['Item Code'] = data['Item Code'].astype('string')
-    data['Date'] = pd.to_datetime(data['Date'], errors='coerce')
-    data['Quantity Sold (kilo)'] = pd.to_numeric(
-        data['Quantity Sold (kilo)'], errors='coerce')
-
-    forecast_list_result = []
-    for unique_code in data['Item Code'].unique():
-        item_data = data[data['Item Code'] == unique_code].copy()
-
-        # aggregate by date
-        item_data = item_data.groupby('Date', as_index=False)[
-            'Quantity Sold (kilo)'].sum()
-
-        # drop invalid dates / negative or NaN y
-        item_data = item_data[item_data['Date'].notna()]
-        item_data = item_data[item_data['Quantity Sold (kilo)'].notna() & (
-            item_data['Quantity Sold (kilo)'] >= 0)]
-
-        if item_data.shape[0] < 2:
-            continue
-
-        item_data = item_data.rename(
-            columns={'Date': 'ds', 'Quantity Sold (kilo)': 'y'})
-
-        product_name = (
-            data.loc[data['Item Code'] == unique_code, 'product_name']
-            .iloc[0]
-        )
-
-        # initialize and fit
-        model = Prophet(yearly_seasonality=False,
-                        changepoint_prior_scale=0.001)
-        model.add_seasonality(name='yearly', period=365.25, fourier_order=9)
-        model.add_seasonality(name='weekly', period=7, fourier_order=3)
-        model.add_seasonality(name='monthly', period=30.5, fourier_order=5)
-
-        model.fit(item_data)        # pass the DataFrame directly
+import streamlit as st
 
-        future = model.make_future_dataframe(periods=30)
-        forecast = model.predict(future)
-        forecast["yhat"] = forecast["yhat"].clip(lower=0)
-        forecast["yhat_lower"] = forecast["yhat_lower"].clip(lower=0)
-        forecast["yhat_upper"] = forecast["yhat_upper"].clip(lower=0)
-        forecast['Item Code'] = unique_code
-        forecast['product_name'] = product_name
-        forecast_list_result.append(
-            forecast[['Item Code', 'product_name', 'ds', 'yhat', 'yhat_lower', 'yhat_upper']])
-    return forecast_list_result
+from forecast_artifact import read_manifest
+from forecast_table import ForecastTable
+from inventory import forecast_summary
+from pages import (forecast_progress, home_page, inventory_page, refresh_summary,
+                   store_options, sync_forecasts, timing_panel, use_artifact)
+from timing import new_buffer, record, use_buffer
 
+# The pages live in pages.py so that Streamlit's reruns of this script only
+# re-execute the layout below; heavy dependencies (Prophet, Stan) are
+# imported lazily by the code paths that fit models.
 
 # ---------------------------
 # Page Config
 # ---------------------------
+rerun_start = time.perf_counter()
 st.title("Inventory Management App")
 
 
@@ -87,6 +24,12 @@ st.title("Inventory Management App")
 # Session Sate200
 # ---------------------------
 
+# this session's reruns time into their own buffer, so the timings panel
+# never shows another user's spans
+if "timing_spans" not in st.session_state:
+    st.session_state.timing_spans = new_buffer()
+use_buffer(st.session_state.timing_spans)
+
 if "df1" not in st.session_state:
     st.session_state.df1 = None
 
@@ -94,7 +37,10 @@ if "df2" not in st.session_state:
     st.session_state.df2 = None
 
 if "forecasts" not in st.session_state:
-    st.session_state.forecasts = pd.DataFrame()
+    st.session_state.forecasts = ForecastTable.from_frame(None)
+
+if "sales_digest" not in st.session_state:
+    st.session_state.sales_digest = None
 
 if "file_name" not in st.session_state:
     st.session_state.file_name = None
@@ -102,285 +48,66 @@ if "file_name" not in st.session_state:
 if "sales_name" not in st.session_state:
     st.session_state.sales_name = None
 
+if "selling_prices" not in st.session_state:
+    st.session_state.selling_prices = None
+
 if "selected_time" not in st.session_state:
     st.session_state.selected_item = None
 
+if "forecast_summary" not in st.session_state:
+    st.session_state.forecast_summary = forecast_summary(None)
+
+if "inventory" not in st.session_state:
+    st.session_state.inventory = None
+
+if "forecast_job" not in st.session_state:
+    st.session_state.forecast_job = None
+
+if "forecast_items" not in st.session_state:
+    st.session_state.forecast_items = 0
+
 if "df2_pred" not in st.session_state:
     st.session_state.df2_pred = None
 
+if "store" not in st.session_state:
+    st.session_state.store = None
+
 if "page" not in st.session_state:
     st.session_state.page = "Home"
 
+if "artifact" not in st.session_state:
+    # latest forecast_cli.py run, if any; see use_artifact below
+    st.session_state.artifact = read_manifest()
+
+
+stores = store_options()
+if st.session_state.store not in (stores or [None]):
+    st.session_state.store = stores[0] if stores else None
+    refresh_summary()
+
+sync_forecasts()
+if st.session_state.forecasts.empty and st.session_state.forecast_job is None:
+    use_artifact()
+
 with st.sidebar:
     st.sidebar.title("Navigation")
     if st.button("Home"):
         st.session_state.page = "Home"
     if st.button("View Inventory"):
         st.session_state.page = "Inventory"
+    if stores:
+        st.selectbox("Store", stores, key="store", on_change=refresh_summary)
 
-# ---------------------------
-# Importing Model
-# ---------------------------
-dummy_model = DummySalesModel()
-
-# ---------------------------
-# Inputting CSV
-# ---------------------------
-
-
-def home_page():
-    success = 0
-    st.write("## Home Page")
-    with st.container():
-        # Input CSV
-        if st.session_state.df1 is None:
-            stock_csv = st.file_uploader(
-                "Import This Month's Stock (.csv)", type="csv")
-            if stock_csv is not None:
-                st.session_state.df1 = pd.read_csv(stock_csv,)
-                st.session_state.file_name = stock_csv.name
-
-        if st.session_state.df2 is None:
-            sales_csv = st.file_uploader(
-                "Import This Month's Sales (.csv)", type="csv")
-            if sales_csv is not None:
-                st.session_state.df2 = pd.read_csv(
-                    sales_csv, parse_dates=["Date"])
-                st.session_state.sales_name = sales_csv.name
-
-                # Real Forecast
-                forecasts = get_prediction(st.session_state.df2)
-                st.session_state.forecasts = pd.concat(
-                    forecasts, ignore_index=True)
-
-        if st.session_state.df1 is not None:
-            st.success(f"Successfully Uploaded File: {
-                       st.session_state.file_name}")
-            st.toast("Successfully Uploaded!", icon="✅", duration=1)
-            success += 1
-        if st.session_state.df2 is not None:
-            st.success(f"Successfully Uploaded File: {
-                       st.session_state.sales_name}")
-            st.toast("Successfully Uploaded!", icon="✅", duration=1)
-            success += 1
-
-        if success == 2:
-            st.set_page_config(layout="wide")
-
-    st.divider()
-
-    # ---------------------------
-    # Showing Data
-    # ---------------------------
-
-    stock_col, plot_col = st.columns([1, 1], gap="medium")
-    df1 = st.session_state.df1
-    df2 = st.session_state.df2
-    forecasts = st.session_state.forecasts
-
-    with stock_col.container(border=True, height=1000):
-        st.title("Current Month's Inventory")
-        if df1 is None:
-            st.warning("You need to upload this month's (.csv) file.")
-        else:
-            with st.container(border=True):
-                for _, row in df1.iterrows():
-                    p_id = str(row["Item Code"]).strip()
-                    p_name = row["product_name"]
-                    curr_stock = row["inventory"]
-
-                    item_forecast = forecasts[forecasts["Item Code"].astype(
-                        str).str.strip() == p_id]
-                    if item_forecast.empty:
-                        pred_value = 0
-                    else:
-                        future_pred = item_forecast.tail(30)
-                        pred_value = int(future_pred["yhat"].sum())
-
-                    with st.container(horizontal=True, border=True):
-                        c_name, c_currstock, c_pred, c_suppname, c_button = st.columns([
-                                                                                       1, 1, 1, 1, 1])
-                    with c_name:
-                        st.write(f"#### {p_name}")
-                        st.caption(f"ID: {p_id}")
-
-                    with c_currstock:
-                        diff = (curr_stock - pred_value)
-                        st.metric("Inventory", curr_stock, diff)
-                    with c_pred:
-                        st.metric("Prediction", pred_value)
-                    with c_suppname:
-                        st.write(row["supplier_name"])
-                        st.caption("Supplier")
-                    with c_button:
-                        if st.button("Select", key=f"select_{p_name}"):
-                            st.session_state.selected_item = p_name
-
-    with plot_col.container(border=True):
-        st.title("Item Sale's Plot")
-        if df2 is None:
-            st.warning("You need to upload this month's (.csv) file.")
-        else:
-            product_list = df2["product_name"].unique().tolist()
-
-            default_index = (
-                product_list.index(st.session_state.selected_item) if st.session_state.selected_item in product_list
-                else 0
-            )
-
-            st.session_state.selected_item = st.selectbox(
-                "Choose A Product", product_list, index=default_index)
-            df2_plot = df2[df2["product_name"] ==
-                           st.session_state.selected_item].copy()
-            df2_plot["Date"] = pd.to_datetime(df2_plot["Date"])
-
-            # Sum Quantity Sold per day
-            df2_plot = (
-                df2_plot.groupby("Date", as_index=False)[
-                    "Quantity Sold (kilo)"].sum()
-            )
-
-            # Sort and filter latest 30 days
-            df2_plot = df2_plot.sort_values("Date")
-            end_date = df2_plot["Date"].max()
-            start_date = end_date - timedelta(days=30)
-            df2_plot = df2_plot[(df2_plot["Date"] >= start_date) & (
-                df2_plot["Date"] <= end_date)]
-
-            df2_pred_plot = forecasts[forecasts["product_name"]
-                                      == st.session_state.selected_item].copy()
-            df2_pred_plot = df2_pred_plot.sort_values("ds")
-            df2_pred_plot["ds"] = pd.to_datetime(df2_pred_plot["ds"])
-            pred_end_date = df2_pred_plot["ds"].max()
-            pred_start_date = pred_end_date - timedelta(days=30)
-            df2_pred_plot = df2_pred_plot[(df2_pred_plot["ds"] >= pred_start_date) & (
-                df2_pred_plot["ds"] <= pred_end_date)]
-            # Real Sales Plot
-            if (not df2_plot.empty) and {"Date", "Quantity Sold (kilo)"}.issubset(df2_plot.columns):
-                fig = go.Figure()
-
-                # Sales trace
-                fig.add_trace(
-                    go.Scatter(
-                        x=df2_plot["Date"],
-                        y=df2_plot["Quantity Sold (kilo)"],
-                        mode="lines+markers",
-                        name=f"{st.session_state.selected_item} Sales"
-                    )
-                )
-
-                # Styling
-                fig.update_layout(
-                    title=f"Daily Sales for {st.session_state.selected_item}",
-                    xaxis=dict(title="Date"),
-                    yaxis=dict(title="Sales (units)"),
-                    height=520,
-                    legend=dict(
-                        orientation="h",
-                        yanchor="top",
-                        y=-0.3,
-                        xanchor="center",
-                        x=0.5,
-                    )
-                )
-                # st.plotly_chart(fig, use_container_width=True)
-            # Predicted Sales Plot
-            if (not df2_pred_plot.empty) and {"ds", "yhat"}.issubset(df2_pred_plot.columns):
-                pred_fig = go.Figure()
-
-                # Predicted Sales trace
-                pred_fig.add_trace(
-                    go.Scatter(
-                        x=df2_pred_plot["ds"],
-                        y=df2_pred_plot["yhat"],
-                        mode="lines+markers",
-                        name=f"{st.session_state.selected_item} Predicted Sales"
-                    )
-                )
-
-                # compare to Real
-                pred_fig.add_trace(
-                    go.Scatter(
-                        x=df2_plot["Date"],
-                        y=df2_plot["Quantity Sold (kilo)"],
-                        mode="lines+markers",
-                        name=f"{st.session_state.selected_item} Sales"
-                    )
-                )
-
-                # Styling
-                pred_fig.update_layout(
-                    title=f"Daily Prediction Sales for {
-                        st.session_state.selected_item}",
-                    xaxis=dict(title="Date"),
-                    yaxis=dict(title="Sales (units)"),
-                    height=520
-                )
-                st.plotly_chart(fig, use_container_width=True)
-
-                st.plotly_chart(pred_fig, use_container_width=True)
-
-    st.divider()
-    # ---------------------------
-    # Export CSV
-    # ---------------------------
-    st.title("Export to CSV")
-    col1, col2 = st.columns(2)
-
-    forecasts_30d = (
-        forecasts
-        .sort_values("ds")
-        .groupby("product_name", group_keys=False)
-        .apply(lambda x: x.tail(30))
-        .groupby("product_name", as_index=False)["yhat"]
-        .sum()
-    )
-
-    merged = df1.merge(
-        forecasts_30d[["product_name", "yhat"]],
-        on="product_name",
-        how="inner"
-    )
-    merged["stock_needed"] = merged["yhat"] - merged["inventory"]
-    merged["stock_needed"] = merged["stock_needed"].clip(lower=0)
-    merged["stock_needed"] = np.ceil(merged["stock_needed"]).astype(int)
-    export_df = merged[["product_name", "stock_needed", "supplier_name"]]
-    csv_data = export_df.to_csv(index=False).encode("utf-8")
-
-    # if col1.button("Export Predicted Stock Needed"):
-    #     try:
-    #         st.success("Published ALERT_ON")
-    #     except Exception as e:
-    #         st.error(f"Publish failed: {e}")
-
-    with col1:
-        st.download_button(
-            label="Export Predicted Stock Needed",
-            data=csv_data,
-            file_name="predicted_stock_needed.csv",
-            mime="text/csv"
-        )
-
-    with col2:
-        st.dataframe(export_df)
-
-
-def inventory_page():
-    st.write("## Raw CSV")
-    df1 = st.session_state.df1
-    df2 = st.session_state.df2
-    if df1 is not None:
-        st.success(f"Successfully Uploaded File: {st.session_state.file_name}")
-        st.write(df1)
-    else:
-        st.warning("No CSV uploaded yet!")
-    if df2 is not None:
-        st.success(f"Successfully Uploaded File: {
-                   st.session_state.sales_name}")
-        st.write(df2)
-    else:
-        st.warning("No CSV uploaded yet!")
+    job = st.session_state.forecast_job
+    if job is not None:
+        running = not job.progress()[2]
+        st.fragment(forecast_progress, run_every=1 if running else None)()
+    elif not st.session_state.forecasts.empty and st.session_state.artifact:
+        st.caption(f"Forecasts from the run of {
+                   st.session_state.artifact['created']}.")
 
+    with st.expander("Timings"):
+        timing_panel()
 
 # ---------------------------
 # Page Router
@@ -392,3 +119,5 @@ if page == "Home":
 
 if page == "Inventory":
     inventory_page()
+
+record("app.rerun", time.perf_counter() - rerun_start, page=page)
@@ -0,0 +1,183 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from forecast_config import FORECAST_COLUMNS, HORIZON_DAYS, MODEL_CONFIG
+from timing import span
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Same trend setup as Prophet's defaults.
+N_CHANGEPOINTS = 25
+CHANGEPOINT_RANGE = 0.8
+
+# Ridge penalties come from Prophet's prior scales: lambda = (noise / prior)^2
+# on the max-scaled series.
+NOISE_SCALE = 1.0
+TREND_PRIOR_SCALE = 5.0
+SEASONALITY_PRIOR_SCALE = 10.0
+
+# z-score of Prophet's default 80% interval.
+INTERVAL_Z = 1.2816
+
+# Items solved together; bounds the size of the padded design arrays.
+BATCH_ITEMS = 64
+
+NS_PER_DAY = 24 * 3600 * 10**9
+
+
+# ---------------------------
+# Features
+# ---------------------------
+
+def fourier_features(days, seasonalities=MODEL_CONFIG['seasonalities']):
+    """Prophet-style sin/cos terms of ``days`` (days since the epoch)."""
+    # items share one calendar, so evaluate each distinct day only once
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    columns = []
+    for seasonality in seasonalities:
+        orders = np.arange(1, seasonality['fourier_order'] + 1)
+        x = 2 * np.pi * unique_days[:, None] * orders / seasonality['period']
+        columns.extend([np.sin(x), np.cos(x)])
+    return np.concatenate(columns, axis=-1)[inverse.reshape(days.shape)]
+
+
+def trend_features(t, changepoints):
+    """Intercept, slope and one hinge ``(t - s)+`` per changepoint."""
+    hinges = np.maximum(t[..., None] - changepoints[:, None, :], 0)
+    return np.concatenate([np.ones_like(t)[..., None], t[..., None], hinges], axis=-1)
+
+
+def penalties(n_seasonal, n_regressors=0):
+    """Ridge penalty per design-matrix column."""
+    trend = (NOISE_SCALE / TREND_PRIOR_SCALE) ** 2
+    changepoint = (NOISE_SCALE / MODEL_CONFIG['changepoint_prior_scale']) ** 2
+    seasonal = (NOISE_SCALE / SEASONALITY_PRIOR_SCALE) ** 2
+    # Prophet's regressors default to the seasonality prior scale
+    return np.concatenate([
+        [trend, trend],
+        np.full(N_CHANGEPOINTS, changepoint),
+        np.full(n_seasonal + n_regressors, seasonal),
+    ])
+
+
+# ---------------------------
+# Batched Fit
+# ---------------------------
+
+def _changepoints(t):
+    """Changepoint positions Prophet would pick for one item's ``t``."""
+    hist_size = int(np.floor(len(t) * CHANGEPOINT_RANGE))
+    n_changepoints = min(N_CHANGEPOINTS, hist_size - 1)
+    points = np.full(N_CHANGEPOINTS, np.inf)
+    if n_changepoints > 0:
+        indexer = np.linspace(0, hist_size - 1, n_changepoints + 1).round().astype(int)
+        points[:n_changepoints] = t[indexer[1:]]
+    return points
+
+
+def forecast_batch(tasks, horizon=HORIZON_DAYS):
+    """Fit and forecast a batch of items with one regularized solve.
+
+    Every item gets the same design as the Prophet backend (piecewise-linear
+    trend plus Fourier seasonalities) stacked into padded
+    ``(items, rows, features)`` arrays, and all ridge systems are solved
+    together. Returns one frame per task in ``FORECAST_COLUMNS`` order, with
+    the ``horizon`` future days (and the fitted history with
+    ``MODEL_CONFIG['include_history']``) like the Prophet backend. Extra
+    columns of the tasks' frames (e.g. ``discount``) are regressors, 0 over
+    the horizon and for items without them.
+    """
+    n = len(tasks)
+    lengths = np.array([len(item_data) for _, _, item_data in tasks])
+    width = lengths.max() + horizon
+    regressors = sorted({column for _, _, item_data in tasks
+                         for column in item_data.columns} - {'ds', 'y'})
+
+    days = np.zeros((n, width))
+    y = np.zeros((n, width))
+    weight = np.zeros((n, width))
+    extra = np.zeros((n, width, len(regressors)))
+    dates = []
+    for i, (_, _, item_data) in enumerate(tasks):
+        ds = item_data['ds'].to_numpy(dtype='datetime64[ns]')
+        future = ds[-1] + np.arange(1, horizon + 1) * np.timedelta64(1, 'D')
+        ds = np.concatenate([ds, future])
+        dates.append(ds)
+        size = len(ds)
+        days[i, :size] = ds.astype(np.int64) / NS_PER_DAY
+        days[i, size:] = days[i, size - 1]
+        y[i, :lengths[i]] = item_data['y'].to_numpy(dtype=float)
+        weight[i, :lengths[i]] = 1.0
+        for k, regressor in enumerate(regressors):
+            if regressor in item_data.columns:
+                extra[i, :lengths[i], k] = item_data[regressor].to_numpy(dtype=float)
+
+    # Prophet scales time to [0, 1] over the history and y by its max
+    start = days[:, 0]
+    span = np.array([days[i, lengths[i] - 1] - start[i] for i in range(n)])
+    span[span == 0] = 1.0
+    t = (days - start[:, None]) / span[:, None]
+    y_scale = np.abs(y).max(axis=1)
+    y_scale[y_scale == 0] = 1.0
+    y_scaled = y / y_scale[:, None]
+
+    changepoints = np.stack([_changepoints(t[i, :lengths[i]]) for i in range(n)])
+    seasonal = fourier_features(days)
+    X = np.concatenate([trend_features(t, changepoints), seasonal, extra], axis=-1)
+
+    Xw = X * weight[..., None]
+    A = np.matmul(Xw.transpose(0, 2, 1), X)
+    A += np.diag(penalties(seasonal.shape[-1], len(regressors)))
+    b = np.matmul(Xw.transpose(0, 2, 1), y_scaled[..., None])
+    beta = np.linalg.solve(A, b)
+
+    yhat = np.matmul(X, beta)[..., 0] * y_scale[:, None]
+    residuals = (y - yhat) * weight
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / np.maximum(lengths - 1, 1))
+    band = INTERVAL_Z * sigma[:, None]
+    lower = np.clip(yhat - band, 0, None)
+    upper = np.clip(yhat + band, 0, None)
+    yhat = np.clip(yhat, 0, None)
+
+    forecasts = []
+    for i, (unique_code, product_name, _) in enumerate(tasks):
+        rows = slice(0 if MODEL_CONFIG['include_history'] else lengths[i],
+                     len(dates[i]))
+        forecasts.append(pd.DataFrame({
+            'Item Code': unique_code,
+            'product_name': product_name,
+            'ds': dates[i][rows],
+            'yhat': yhat[i, rows],
+            'yhat_lower': lower[i, rows],
+            'yhat_upper': upper[i, rows],
+        }, columns=FORECAST_COLUMNS))
+    return forecasts
+
+
+class BatchForecaster:
+    """Vectorized NumPy alternative to the per-item Prophet backend.
+
+    Same task/result interface as ``forecast.ProphetForecaster``; the
+    Prophet-specific options (workers, cache, warm start) are ignored.
+    """
+
+    name = "numpy"
+
+    def iter_forecasts(self, tasks, **options):
+        for start in range(0, len(tasks), BATCH_ITEMS):
+            batch = tasks[start:start + BATCH_ITEMS]
+            try:
+                with span("batch_forecast.forecast_batch", items=len(batch)):
+                    forecasts = forecast_batch(batch)
+            except Exception:
+                logger.exception("Batch forecast failed for items %d-%d.",
+                                 start, start + len(batch) - 1)
+                forecasts = [None] * len(batch)
+            for offset, forecast in enumerate(forecasts):
+                yield start + offset, forecast
@@ -0,0 +1,106 @@
+"""Sales cleaning benchmark: timings and forecast accuracy.
+
+Forecasts the bundled sales data with and without the cleaning stage of
+``preprocess.item_series`` (outlier clipping, the ``discount`` regressor)
+and writes a JSON report, e.g.::
+
+    python benchmarks/cleaning_bench.py --backends prophet numpy --origins 6
+
+Accuracy is the rolling-origin backtest of forecast_bench.py against the
+uncleaned daily sales (returns netted out). The cleaning stage itself is
+also timed on the full annex1 catalog.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import preprocess  # noqa: E402
+from forecast import get_prediction  # noqa: E402
+from forecast_bench import CATALOG_FILE, SALES_FILE, backtest, catalog_sales  # noqa: E402
+from forecast_config import HORIZON_DAYS  # noqa: E402
+from ingest import read_sales  # noqa: E402
+
+# name -> (SALES_CLIP_MAD, DISCOUNT_REGRESSOR)
+VARIANTS = {
+    "none": (0.0, False),
+    "clip": (preprocess.SALES_CLIP_MAD, False),
+    "discount": (0.0, True),
+    "clip+discount": (preprocess.SALES_CLIP_MAD, True),
+}
+
+
+def use_variant(name):
+    preprocess.SALES_CLIP_MAD, preprocess.DISCOUNT_REGRESSOR = VARIANTS[name]
+
+
+def stage_seconds(daily, repeat=5):
+    """Best-of-``repeat`` seconds for ``item_series`` over ``daily``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        preprocess.item_series(daily)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_case(daily, catalog, backend, variant, origins, workers):
+    use_variant(variant)
+    start = time.perf_counter()
+    forecasts = get_prediction(daily, backend, workers=workers, cache=None)
+    seconds = time.perf_counter() - start
+    return {
+        "backend": backend,
+        "variant": variant,
+        "stage_seconds": stage_seconds(daily),
+        "catalog_stage_seconds": stage_seconds(catalog, repeat=1),
+        "forecast_items": len(forecasts),
+        "forecast_seconds": seconds,
+        "backtest": backtest(daily, backend, origins, workers),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=Path, default=SALES_FILE)
+    parser.add_argument("--backends", nargs="+", default=["prophet", "numpy"])
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS),
+                        default=list(VARIANTS))
+    parser.add_argument("--origins", type=int, default=6,
+                        help="rolling-origin backtest windows")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=Path("cleaning_bench.json"))
+    args = parser.parse_args(argv)
+
+    daily = read_sales(args.sales)
+    catalog = catalog_sales(pd.read_csv(SALES_FILE), len(pd.read_csv(CATALOG_FILE)))
+
+    cases = []
+    for backend in args.backends:
+        for variant in args.variants:
+            print(f"{backend}/{variant}", file=sys.stderr)
+            cases.append(run_case(daily, catalog, backend, variant, args.origins,
+                                  args.workers))
+
+    report = {
+        "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sales": str(args.sales),
+        "horizon_days": HORIZON_DAYS,
+        "clip_window": preprocess.SALES_CLIP_WINDOW,
+        "cases": cases,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
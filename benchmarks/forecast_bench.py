@@ -0,0 +1,235 @@
+"""Forecast speed and accuracy benchmark.
+
+Replays the bundled sales data through the forecasting pipeline at several
+catalog sizes and history lengths and writes a JSON report, e.g.::
+
+    python benchmarks/forecast_bench.py --backends prophet numpy \
+        --sizes 5 50 all --history 90 365 all --output bench.json
+
+Only five items have real sales in clean_sample_data/sales_data.csv, so
+larger catalogs reuse those histories for the raw_data/annex1.csv items,
+each rescaled and with seeded noise. Pass ``--sales`` to benchmark a real
+file (e.g. annex2) instead.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from forecast import get_prediction  # noqa: E402
+from forecast_config import FORECAST_MODE, HORIZON_DAYS  # noqa: E402
+from ingest import read_sales  # noqa: E402
+from preprocess import daily_item_sales  # noqa: E402
+
+SALES_FILE = ROOT / "clean_sample_data" / "sales_data.csv"
+CATALOG_FILE = ROOT / "raw_data" / "annex1.csv"
+
+
+# ---------------------------
+# Data
+# ---------------------------
+
+def catalog_sales(sales, n_items, seed=0):
+    """Daily sales for ``n_items`` annex1 items built from ``sales``.
+
+    The first items keep their real histories; the rest cycle through them
+    with a random scale and multiplicative noise.
+    """
+    daily = daily_item_sales(sales)
+    histories = [frame for _, frame in daily.groupby('Item Code', sort=False)]
+    catalog = pd.read_csv(CATALOG_FILE, dtype={'Item Code': str})
+    rng = np.random.default_rng(seed)
+
+    frames = []
+    for i, item in enumerate(catalog.head(n_items).itertuples(index=False)):
+        history = histories[i % len(histories)]
+        quantity = history['Quantity Sold (kilo)'].to_numpy(dtype=float)
+        if i >= len(histories):
+            scale = rng.uniform(0.5, 2.0)
+            quantity = quantity * scale * rng.lognormal(0, 0.2, len(quantity))
+        frames.append(pd.DataFrame({
+            'Item Code': item[0],
+            'product_name': item[1],
+            'Date': history['Date'].to_numpy(),
+            'Quantity Sold (kilo)': quantity,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def last_days(daily, days):
+    """Each item's own last ``days`` days, so items that stopped selling
+    earlier than others still take part."""
+    if days is None:
+        return daily
+    keys = [name for name in ['Store', 'Item Code'] if name in daily.columns]
+    last = daily.groupby(keys, observed=True)['Date'].transform('max')
+    return daily[daily['Date'] > last - pd.Timedelta(days=days)]
+
+
+# ---------------------------
+# Measurements
+# ---------------------------
+
+def peak_rss_mb():
+    """High-water RSS of this process and its finished children, in MB.
+
+    On Linux the process' own peak comes from ``VmHWM``, because
+    ``ru_maxrss`` keeps the parent's peak across fork and exec.
+    """
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    own = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own, children / scale
+
+
+def measured_forecast(daily, backend, workers, mode=None):
+    """Forecast ``daily`` and return ``(items, seconds, rss, children_rss)``.
+
+    Meant to run in a fresh process per case: ``ru_maxrss`` is a lifetime
+    high-water mark, so only then is the peak this case's own (imports and
+    the case's data included) rather than the largest case so far.
+    """
+    start = time.perf_counter()
+    forecasts = get_prediction(daily, backend, mode=mode, workers=workers,
+                               cache=None)
+    seconds = time.perf_counter() - start
+    return (len(forecasts), seconds) + peak_rss_mb()
+
+
+def backtest(daily, backend, origins, workers, mode=None, horizon=HORIZON_DAYS):
+    """Rolling-origin MAPE/WAPE over ``origins`` horizon-long windows."""
+    end = daily['Date'].max()
+    errors = []
+    for k in range(origins, 0, -1):
+        origin = end - pd.Timedelta(days=horizon * k)
+        train = daily[daily['Date'] <= origin]
+        actual = daily[(daily['Date'] > origin)
+                       & (daily['Date'] <= origin + pd.Timedelta(days=horizon))]
+        if train.empty or actual.empty:
+            continue
+        forecasts = get_prediction(train, backend, mode=mode, workers=workers,
+                                   cache=None)
+        if not forecasts:
+            continue
+        predicted = pd.concat(forecasts, ignore_index=True)
+        predicted['Item Code'] = predicted['Item Code'].astype(str)
+        actual = actual.assign(**{'Item Code': actual['Item Code'].astype(str)})
+        merged = actual.merge(predicted, left_on=['Item Code', 'Date'],
+                              right_on=['Item Code', 'ds'])
+        errors.append(merged[['Quantity Sold (kilo)', 'yhat']])
+
+    if not errors:
+        return {"mape": None, "wape": None, "points": 0}
+    merged = pd.concat(errors, ignore_index=True)
+    y = merged['Quantity Sold (kilo)'].to_numpy(dtype=float)
+    error = np.abs(y - merged['yhat'].to_numpy(dtype=float))
+    positive = y > 0
+    return {
+        "mape": float((error[positive] / y[positive]).mean()) if positive.any() else None,
+        "wape": float(error.sum() / y.sum()) if y.sum() else None,
+        "points": int(len(y)),
+    }
+
+
+def run_case(daily, backend, workers, origins, mode=None):
+    # spawn, not fork: a forked child would start from this process' memory
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        n_forecasts, seconds, rss, children_rss = executor.submit(
+            measured_forecast, daily, backend, workers, mode).result()
+    return {
+        "items": int(daily['Item Code'].nunique()),
+        "rows": int(len(daily)),
+        "forecast_items": n_forecasts,
+        "forecast_seconds": seconds,
+        "peak_rss_mb": rss,
+        "peak_children_rss_mb": children_rss,
+        "backtest": backtest(daily, backend, origins, workers, mode),
+    }
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+
+def parse_size(value):
+    return None if value == "all" else int(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=Path, default=None,
+                        help="sales CSV to replay instead of the bundled sample")
+    parser.add_argument("--backends", nargs="+", default=["prophet", "numpy"])
+    parser.add_argument("--modes", nargs="+", default=[FORECAST_MODE],
+                        choices=["item", "category", "reconciled"],
+                        help="per-item and/or category-level forecasting")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[5, 50, None],
+                        help="catalog sizes, or 'all'")
+    parser.add_argument("--history", nargs="+", type=parse_size, default=[90, 365, None],
+                        help="days of history per item, or 'all'")
+    parser.add_argument("--origins", type=int, default=3,
+                        help="rolling-origin backtest windows")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=Path("forecast_bench.json"))
+    args = parser.parse_args(argv)
+
+    if args.sales is not None:
+        source = read_sales(args.sales)
+        n_catalog = source['Item Code'].nunique()
+    else:
+        source = pd.read_csv(SALES_FILE)
+        n_catalog = len(pd.read_csv(CATALOG_FILE))
+
+    cases = []
+    for size in args.sizes:
+        n_items = n_catalog if size is None else min(size, n_catalog)
+        if args.sales is not None:
+            codes = source['Item Code'].unique()[:n_items]
+            daily = source[source['Item Code'].isin(codes)]
+        else:
+            daily = catalog_sales(source, n_items)
+        for days in args.history:
+            data = last_days(daily, days)
+            for backend in args.backends:
+                for mode in args.modes:
+                    print(f"{backend}/{mode}: {n_items} items, "
+                          f"history {days or 'all'} days", file=sys.stderr)
+                    result = run_case(data, backend, args.workers, args.origins,
+                                      mode)
+                    result.update(backend=backend, mode=mode,
+                                  catalog_size=size or "all",
+                                  history_days=days or "all")
+                    cases.append(result)
+
+    report = {
+        "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "horizon_days": HORIZON_DAYS,
+        "cases": cases,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Per-session forecast memory benchmark.
+
+Forecasts the whole raw_data/annex1.csv catalog (built like
+forecast_bench.py does) and measures the memory that N app sessions need
+to hold those forecasts, e.g.::
+
+    python benchmarks/memory_bench.py --sessions 1 10 50 --output memory_bench.json
+
+Layouts compared:
+
+* ``frame+history``: one concatenated DataFrame per session, with the
+  fitted history rows (the app's forecasts before ``FORECAST_HISTORY``).
+* ``frame``: the same, horizon rows only.
+* ``table``: one ``ForecastTable`` shared by every session.
+* ``memmap``: that table memory-mapped from disk (``FORECAST_MEMMAP_DIR``).
+
+Memory is what ``tracemalloc`` sees allocated (NumPy and pandas report
+their buffers to it); pages mapped from a file are not private memory and
+do not show up.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from forecast import get_prediction  # noqa: E402
+from forecast_bench import CATALOG_FILE, SALES_FILE, catalog_sales  # noqa: E402
+from forecast_config import HORIZON_DAYS, MODEL_CONFIG  # noqa: E402
+from forecast_table import ForecastTable, shared_table  # noqa: E402
+
+LAYOUTS = ["frame+history", "frame", "table", "memmap"]
+
+
+# ---------------------------
+# Data
+# ---------------------------
+
+def forecast_frames(daily, history):
+    """Per-item numpy-backend forecasts, with or without the fitted history."""
+    include_history = MODEL_CONFIG['include_history']
+    MODEL_CONFIG['include_history'] = history
+    try:
+        return get_prediction(daily, "numpy")
+    finally:
+        MODEL_CONFIG['include_history'] = include_history
+
+
+def session_state(layout, frames, table_dir):
+    """``(build, shared)``: how one session's forecasts for ``layout`` are built.
+
+    Shared layouts are built once and then referenced by every session.
+    """
+    if layout.startswith("frame"):
+        # every session concatenated (or unpickled) its own copy
+        return lambda: pd.concat(frames, ignore_index=True), False
+    if layout == "memmap":
+        return lambda: shared_table(ForecastTable.from_frames(frames),
+                                    "memory_bench", table_dir), True
+    return lambda: ForecastTable.from_frames(frames), True
+
+
+def traced_bytes(build, sessions, shared):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build()]
+    for _ in range(sessions - 1):
+        held.append(held[0] if shared else build())
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del held
+    return used
+
+
+# ---------------------------
+# Benchmark
+# ---------------------------
+
+def run_case(layout, frames, sessions, table_dir):
+    build, shared = session_state(layout, frames, table_dir)
+    state = build()
+    unpack_ms = None
+    if shared:
+        # what the app pays per rerun to read the selected store's rows
+        start = time.perf_counter()
+        state.to_frame()
+        unpack_ms = (time.perf_counter() - start) * 1000
+
+    result = {"layout": layout, "rows": len(state), "to_frame_ms": unpack_ms,
+              "sessions": {}}
+    for count in sessions:
+        used = traced_bytes(build, count, shared)
+        result["sessions"][count] = {"total_mb": used / 1e6,
+                                     "per_session_kb": used / count / 1e3}
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 10, 50])
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=LAYOUTS)
+    parser.add_argument("--output", type=Path, default=Path("memory_bench.json"))
+    args = parser.parse_args(argv)
+
+    n_items = len(pd.read_csv(CATALOG_FILE))
+    daily = catalog_sales(pd.read_csv(SALES_FILE), n_items)
+    print(f"Forecasting {n_items} items", file=sys.stderr)
+    frames = {history: forecast_frames(daily, history) for history in (True, False)}
+
+    cases = []
+    with tempfile.TemporaryDirectory() as table_dir:
+        for layout in args.layouts:
+            print(f"{layout}: sessions {args.sessions}", file=sys.stderr)
+            cases.append(run_case(layout, frames[layout == "frame+history"],
+                                  args.sessions, table_dir))
+
+    report = {
+        "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "items": n_items,
+        "horizon_days": HORIZON_DAYS,
+        "cases": cases,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Streamlit cold-start benchmark.
+
+Starts a fresh interpreter per run and measures the time until the app's
+first render finishes, without and with a sales file, e.g.::
+
+    python benchmarks/startup_bench.py --repeat 5 --output startup_bench.json
+
+Streamlit's test runner has no file upload, so the "sales" case does what
+the upload does (parse the file, start the background forecast) before the
+first run. Each run reports the time spent importing and rendering and
+whether Prophet had been imported by then.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SALES_FILE = ROOT / "clean_sample_data" / "sales_data.csv"
+CASES = ["empty", "sales"]
+
+# st.title of app.py; a run that didn't get this far did not render
+APP_TITLE = "Inventory Management App"
+
+
+# ---------------------------
+# Child Process
+# ---------------------------
+
+def first_render(case, sales_file):
+    """One cold start, run in a fresh interpreter; returns its timings."""
+    start = time.perf_counter()
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=600)
+    if case == "sales":
+        from caching import content_digest
+        from ingest import read_sales
+        from jobs import start_forecast_job
+
+        content = sales_file.read_bytes()
+        digest = content_digest(content)
+        at.session_state.df2 = read_sales(sales_file)
+        at.session_state.sales_digest = digest
+        at.session_state.sales_name = sales_file.name
+        at.session_state.forecast_job = start_forecast_job(
+            digest, at.session_state.df2)
+    imported = time.perf_counter()
+
+    at.run()
+    rendered = time.perf_counter()
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception}")
+    # a script that fails to compile renders nothing, without an exception
+    titles = [title.value for title in at.title]
+    if APP_TITLE not in titles:
+        raise RuntimeError(f"app did not render (titles: {titles})")
+    return {
+        "import_seconds": imported - start,
+        "render_seconds": rendered - imported,
+        "first_render_seconds": rendered - start,
+        "prophet_loaded": "prophet" in sys.modules,
+    }
+
+
+# ---------------------------
+# Benchmark
+# ---------------------------
+
+def run_case(case, sales_file, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        child = subprocess.run(
+            [sys.executable, __file__, "--child", case, "--sales", str(sales_file)],
+            cwd=ROOT, capture_output=True, text=True)
+        if child.returncode:
+            error = (child.stderr.strip().splitlines() or ["no output"])[-1]
+            sys.exit(f"{case}: cold start failed: {error}")
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        result["process_seconds"] = time.perf_counter() - start
+        runs.append(result)
+
+    summary = {"case": case, "runs": runs}
+    for name in ["import_seconds", "render_seconds", "first_render_seconds",
+                 "process_seconds"]:
+        values = [run[name] for run in runs]
+        summary[name] = {"median": statistics.median(values),
+                         "min": min(values), "max": max(values)}
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--sales", type=Path, default=SALES_FILE)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=Path("startup_bench.json"))
+    parser.add_argument("--child", choices=CASES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(first_render(args.child, args.sales.resolve())), flush=True)
+        # don't wait for the background forecast to finish
+        os._exit(0)
+
+    cases = []
+    for case in args.cases:
+        print(f"{case}: {args.repeat} cold start(s)", file=sys.stderr)
+        cases.append(run_case(case, args.sales.resolve(), args.repeat))
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": cases,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Synthetic sales, stock and price files for load tests.
+
+Builds a seeded, fully vectorized sales log from the raw_data/annex1.csv
+catalog and raw_data/annex4.csv loss rates, with weekly, monthly and
+yearly seasonality, discount days and returns, plus a matching stock file and
+annex1/annex3/annex4-style catalog, wholesale price and loss rate files.
+Output is streamed ``--chunk-days`` days at a time, so any scale fits in
+memory, e.g.::
+
+    python benchmarks/synthetic_data.py --items 1000 --days 730 \
+        --transactions 20 --stores 3
+
+Point the app at it with::
+
+    CATALOG_FILE=synthetic_data/annex1.csv PRICE_FILE=synthetic_data/annex3.csv \
+        LOSS_RATE_FILE=synthetic_data/annex4.csv streamlit run app.py
+
+and upload synthetic_data/sales.csv and synthetic_data/stock.csv. For scale, the
+bundled clean_sample_data/sales_data.csv has 16.5k rows (5 items, 871
+days, ~14 transactions per item and day). ``--format parquet`` writes the
+sales and wholesale prices as .parquet files instead, which the app's
+uploader, ``forecast_cli.py --sales`` and ``PRICE_FILE`` read as well.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from preprocess import DISCOUNT_COLUMN, RETURN_COLUMN  # noqa: E402
+from replenishment import load_loss_rates  # noqa: E402
+
+CATALOG_FILE = ROOT / "raw_data" / "annex1.csv"
+LOSS_RATE_FILE = ROOT / "raw_data" / "annex4.csv"
+
+SUPPLIERS = ["Supplier A", "Supplier B", "Supplier C", "Supplier D",
+             "Supplier E", "Supplier F", "Supplier G", "Supplier H"]
+
+SALES_COLUMNS = ['Date', 'Time', 'Item Code', 'product_name', 'Quantity Sold (kilo)',
+                 'Unit Selling Price (RMB/kg)', RETURN_COLUMN, DISCOUNT_COLUMN]
+
+# shop hours, in seconds after midnight
+OPENING, CLOSING = 8 * 3600, 22 * 3600
+
+
+# ---------------------------
+# Catalog
+# ---------------------------
+
+def build_catalog(n_items, rng):
+    """``n_items`` catalog rows with their base demand, cost, price and supplier.
+
+    The annex1 items come first; beyond those, items are copies of them
+    with new codes. Loss rates come from annex4 (the category median for
+    items it doesn't list).
+    """
+    source = pd.read_csv(CATALOG_FILE, dtype={'Item Code': str})
+    source['Item Code'] = source['Item Code'].str.strip()
+    source['loss_rate'] = load_loss_rates(LOSS_RATE_FILE).reindex(
+        source['Item Code']).to_numpy()
+    source['loss_rate'] = source['loss_rate'].fillna(
+        source.groupby('Category Name')['loss_rate'].transform('median')).fillna(0.1)
+
+    copy = np.arange(n_items) // len(source)
+    catalog = source.iloc[np.arange(n_items) % len(source)].reset_index(drop=True)
+    extra = copy > 0
+    catalog.loc[extra, 'Item Code'] = (
+        "9" + pd.Series(copy[extra]).astype(str).str.zfill(3).to_numpy()
+        + catalog.loc[extra, 'Item Code'].str[4:])
+    catalog.loc[extra, 'Item Name'] = (
+        catalog.loc[extra, 'Item Name'] + " #" + pd.Series(copy[extra]).astype(str).to_numpy())
+
+    catalog['base_kilos'] = rng.lognormal(1.0, 0.8, n_items)
+    catalog['cost'] = rng.lognormal(1.8, 0.5, n_items)
+    # perishable items carry a bigger markup
+    catalog['price'] = catalog['cost'] * (1.3 + catalog['loss_rate'] * 2
+                                          + rng.uniform(0, 0.4, n_items))
+    catalog['supplier_name'] = rng.choice(SUPPLIERS, n_items)
+    return catalog
+
+
+def seasonality(catalog, n_days, start, rng):
+    """Per item-day demand multipliers, shape ``(days, items)``."""
+    n_items = len(catalog)
+    days = np.arange(n_days)
+    weekday = (pd.Timestamp(start).dayofweek + days) % 7
+    weekly = 1 + rng.uniform(0, 0.5, n_items) * np.where(weekday >= 5, 1.0, -0.2)[:, None]
+    phase = rng.uniform(0, 2 * np.pi, n_items)
+    monthly = 1 + rng.uniform(0, 0.3, n_items) * np.sin(
+        2 * np.pi * days[:, None] / 30.5 + phase)
+    yearly = 1 + rng.uniform(0, 0.4, n_items) * np.sin(
+        2 * np.pi * days[:, None] / 365.25 + phase / 2)
+    return weekly * monthly * yearly
+
+
+# ---------------------------
+# Sales
+# ---------------------------
+
+# zero-padded digits, indexed instead of formatting each row
+PAD2 = np.array([f"{i:02d}" for i in range(60)], dtype=object)
+PAD3 = np.array([f".{i:03d}" for i in range(1000)], dtype=object)
+
+
+def clock(seconds, millis):
+    """``HH:MM:SS.mmm`` strings like the raw sales ``Time`` column."""
+    return (PAD2[seconds // 3600] + ":" + PAD2[seconds // 60 % 60] + ":"
+            + PAD2[seconds % 60] + PAD3[millis])
+
+
+def sales_chunk(catalog, stores, dates, demand, transactions, discount_rate,
+                return_rate, rng):
+    """Transaction rows for ``dates`` (``demand`` is their days x items slice)."""
+    n_days, n_items = demand.shape
+    n_stores = len(stores)
+    # (store, day, item) cells; stores differ by a fixed size factor
+    size = np.linspace(1.0, 0.5, n_stores)[:, None, None]
+    discount = rng.random((n_stores, n_days, n_items)) < discount_rate
+    kilos = (catalog['base_kilos'].to_numpy() * demand[None] * size
+             * np.where(discount, 1.6, 1.0))
+    counts = rng.poisson(transactions * kilos / kilos.mean())
+
+    store, day, item = np.unravel_index(np.repeat(np.arange(counts.size),
+                                                  counts.ravel()), counts.shape)
+    n = len(item)
+    quantity = rng.gamma(2.0, (kilos / np.maximum(counts, 1))[store, day, item] / 2.0)
+    on_discount = discount[store, day, item]
+    is_return = rng.random(n) < return_rate
+    quantity = np.where(is_return, -quantity, quantity)
+    price = catalog['price'].to_numpy()[item] * np.where(on_discount, 0.8, 1.0)
+    seconds = rng.integers(OPENING, CLOSING, n)
+
+    order = np.lexsort((seconds, day, store))
+    store, day, item = store[order], day[order], item[order]
+    seconds, quantity, price = seconds[order], quantity[order], price[order]
+    on_discount, is_return = on_discount[order], is_return[order]
+
+    frame = pd.DataFrame({
+        'Date': np.asarray(dates.strftime('%Y-%m-%d'), dtype=object)[day],
+        'Time': clock(seconds, rng.integers(0, 1000, n)),
+        'Item Code': catalog['Item Code'].to_numpy()[item],
+        'product_name': catalog['Item Name'].to_numpy()[item],
+        'Quantity Sold (kilo)': quantity.round(3),
+        'Unit Selling Price (RMB/kg)': price.round(1),
+        RETURN_COLUMN: np.where(is_return, 'return', 'sale'),
+        DISCOUNT_COLUMN: np.where(on_discount, 'Yes', 'No'),
+    }, columns=SALES_COLUMNS)
+    if n_stores > 1:
+        frame.insert(0, 'Store', np.asarray(stores)[store])
+    return frame
+
+
+def wholesale_chunk(catalog, dates, walk):
+    """annex3-style wholesale prices for ``dates`` from the ``walk`` factors."""
+    n_days, n_items = walk.shape
+    return pd.DataFrame({
+        'Date': np.repeat(dates.strftime('%Y-%m-%d'), n_items),
+        'Item Code': np.tile(catalog['Item Code'].to_numpy(), n_days),
+        'Wholesale Price (RMB/kg)': (catalog['cost'].to_numpy() * walk).ravel().round(2),
+    })
+
+
+# ---------------------------
+# Output
+# ---------------------------
+
+class ChunkWriter:
+    """Streams frames to one CSV or Parquet file through pyarrow."""
+
+    def __init__(self, path, file_format):
+        self.path = Path(f"{path}.{file_format}")
+        self.format = file_format
+        self.rows = 0
+        self._writer = None
+        self._file = None
+
+    def write(self, frame):
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            if self.format == "csv":
+                # unquoted like the bundled files (annex1 names have no
+                # commas); pandas' to_csv is several times slower
+                self._file = open(self.path, "wb")
+                self._file.write((",".join(frame.columns) + "\n").encode())
+                self._writer = pv.CSVWriter(
+                    self._file, table.schema,
+                    write_options=pv.WriteOptions(include_header=False,
+                                                  quoting_style="none"))
+            else:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def generate(output, n_items, n_days, transactions, n_stores=1, start="2022-01-01",
+             discount_rate=0.05, return_rate=0.001, chunk_days=30, file_format="csv",
+             seed=0):
+    """Write the synthetic files to directory ``output``; returns row counts."""
+    rng = np.random.default_rng(seed)
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+
+    catalog = build_catalog(n_items, rng)
+    stores = [f"Store {i + 1}" for i in range(n_stores)]
+    demand = seasonality(catalog, n_days, start, rng)
+    walk = np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_items)), axis=0))
+    dates = pd.date_range(start, periods=n_days, freq='D')
+
+    sales = ChunkWriter(output / "sales", file_format)
+    prices = ChunkWriter(output / "annex3", file_format)
+    try:
+        for first in range(0, n_days, chunk_days):
+            window = slice(first, min(first + chunk_days, n_days))
+            sales.write(sales_chunk(catalog, stores, dates[window], demand[window],
+                                    transactions, discount_rate, return_rate, rng))
+            prices.write(wholesale_chunk(catalog, dates[window], walk[window]))
+    finally:
+        sales.close()
+        prices.close()
+
+    # about a fortnight of the last month's demand on hand, less the losses
+    recent = catalog['base_kilos'].to_numpy() * demand[-30:].mean(axis=0) * 14
+    stock = pd.DataFrame({
+        'Item Code': np.tile(catalog['Item Code'], n_stores),
+        'product_name': np.tile(catalog['Item Name'], n_stores),
+        'inventory': np.round(np.tile(recent * (1 - catalog['loss_rate']), n_stores)
+                              * rng.uniform(0.3, 1.5, n_items * n_stores)).astype(int),
+        'supplier_name': np.tile(catalog['supplier_name'], n_stores),
+    })
+    if n_stores > 1:
+        stock.insert(0, 'Store', np.repeat(stores, n_items))
+    stock.to_csv(output / "stock.csv", index=False)
+    catalog[['Item Code', 'Item Name', 'Category Code', 'Category Name']].to_csv(
+        output / "annex1.csv", index=False)
+    catalog.assign(**{'Loss Rate (%)': (catalog['loss_rate'] * 100).round(2)})[
+        ['Item Code', 'Item Name', 'Loss Rate (%)']].to_csv(
+        output / "annex4.csv", index=False)
+    return {"sales": sales.rows, "prices": prices.rows, "stock": len(stock)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=251,
+                        help="items (annex1 has 251; more are copies)")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--transactions", type=float, default=10,
+                        help="mean transactions per item and day")
+    parser.add_argument("--stores", type=int, default=1)
+    parser.add_argument("--start", default="2022-01-01")
+    parser.add_argument("--discount-rate", type=float, default=0.05,
+                        help="share of item-days on discount")
+    parser.add_argument("--return-rate", type=float, default=0.001,
+                        help="share of transactions that are returns")
+    parser.add_argument("--chunk-days", type=int, default=30)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("synthetic_data"))
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows = generate(args.output, args.items, args.days, args.transactions,
+                    args.stores, args.start, args.discount_rate, args.return_rate,
+                    args.chunk_days, args.format, args.seed)
+    print(f"Wrote {rows['sales']} sales, {rows['prices']} price and "
+          f"{rows['stock']} stock rows to {args.output} in "
+          f"{time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
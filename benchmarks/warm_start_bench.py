@@ -0,0 +1,102 @@
+"""Warm-start speed and agreement check for the Prophet backend.
+
+For every item of the bundled sales data, fits the history without its
+last ``--new-days`` days, then refits the full history both cold and
+warm-started from those parameters (what the app does when new days are
+uploaded), e.g.::
+
+    python benchmarks/warm_start_bench.py --output warm_start_bench.json
+
+Exits with status 1 if any warm fit did not actually start from the stored
+parameters, or its forecast differs from the cold one by more than
+``--tolerance`` (relative to the mean cold forecast). This is the check to
+pass before turning ``FORECAST_WARM_START`` on by default; the log
+posteriors show which of the two fits found the better optimum.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from forecast import fit_item, model_params  # noqa: E402
+from forecast_config import HORIZON_DAYS  # noqa: E402
+from preprocess import item_series  # noqa: E402
+
+SALES_FILE = ROOT / "clean_sample_data" / "sales_data.csv"
+
+
+def run_case(unique_code, item_data, new_days, tolerance):
+    previous, _, _ = fit_item(unique_code, None, item_data.iloc[:-new_days])
+    init = model_params(previous)
+
+    start = time.perf_counter()
+    cold_model, cold, _ = fit_item(unique_code, None, item_data)
+    cold_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    warm_model, warm, started = fit_item(unique_code, None, item_data, init=init)
+    warm_seconds = time.perf_counter() - start
+
+    cold_lp, warm_lp = (model.stan_fit.optimized_params_dict['lp__']
+                        for model in (cold_model, warm_model))
+    cold_yhat = cold['yhat'].tail(HORIZON_DAYS).to_numpy()
+    warm_yhat = warm['yhat'].tail(HORIZON_DAYS).to_numpy()
+    scale = max(abs(cold_yhat).mean(), 1e-9)
+    max_diff = float(abs(cold_yhat - warm_yhat).max() / scale)
+    return {
+        "item": str(unique_code),
+        "rows": int(len(item_data)),
+        "cold_seconds": cold_seconds,
+        "warm_seconds": warm_seconds,
+        "warm_started": started,
+        "max_diff": max_diff,
+        "cold_log_posterior": float(cold_lp),
+        "warm_log_posterior": float(warm_lp),
+        "ok": started and max_diff <= tolerance,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=Path, default=SALES_FILE)
+    parser.add_argument("--new-days", type=int, default=7,
+                        help="days appended between the first and the warm fit")
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument("--output", type=Path, default=Path("warm_start_bench.json"))
+    args = parser.parse_args(argv)
+
+    cases = []
+    for unique_code, _, item_data in item_series(pd.read_csv(args.sales)):
+        if len(item_data) <= args.new_days + 2:
+            continue
+        case = run_case(unique_code, item_data, args.new_days, args.tolerance)
+        print(f"{case['item']}: cold {case['cold_seconds']:.2f}s, "
+              f"warm {case['warm_seconds']:.2f}s, max diff {case['max_diff']:.4f}, "
+              f"log posterior {case['cold_log_posterior']:.1f} cold, "
+              f"{case['warm_log_posterior']:.1f} warm"
+              f"{'' if case['ok'] else ' FAILED'}", file=sys.stderr)
+        cases.append(case)
+
+    report = {
+        "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "horizon_days": HORIZON_DAYS,
+        "new_days": args.new_days,
+        "tolerance": args.tolerance,
+        "cases": cases,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Report written to {args.output}", file=sys.stderr)
+    if not all(case["ok"] for case in cases):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
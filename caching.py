@@ -0,0 +1,73 @@
+import io
+import os
+
+import streamlit as st
+
+from forecast_artifact import read_table
+from forecast_cache import content_digest, frame_digest  # noqa: F401
+from forecast_table import ForecastTable, shared_table
+from ingest import read_sales, read_stock
+from plots import figure_json, product_figures, product_series
+from pricing import load_price_index
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Shared across sessions; entries expire after CACHE_TTL_SECONDS and at
+# most CACHE_MAX_ENTRIES are kept per cached function.
+CACHE_TTL_SECONDS = int(os.environ.get("CACHE_TTL_SECONDS", 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 64))
+
+
+# Arguments starting with an underscore are not hashed by Streamlit; the
+# digest argument next to them is the cache key.
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES,
+               show_spinner=False)
+def parse_sales(digest, _content):
+    """``(daily totals, selling prices)`` of an upload, in one pass."""
+    return read_sales(io.BytesIO(_content), prices=True)
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES,
+               show_spinner=False)
+def parse_stock(digest, _content):
+    return read_stock(io.BytesIO(_content))
+
+
+# one packed copy per run for every session, instead of a frame per session
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES,
+                   show_spinner=False)
+def artifact_forecasts(manifest):
+    """Forecasts of a forecast_cli.py run (keyed by its manifest)."""
+    forecasts = read_table(manifest, "forecasts")
+    if forecasts is None:
+        return None
+    return shared_table(ForecastTable.from_frame(forecasts), manifest["run"])
+
+
+# read-only and shared by every session, so it is not copied per rerun
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def price_index():
+    return load_price_index()
+
+
+# built once per sales/forecast state and only read afterwards
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES,
+                   show_spinner=False)
+def plot_series(digest, items, _df2, _forecasts):
+    return product_series(_df2, _forecasts)
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES,
+               show_spinner=False)
+def figures(digest, items, product, days, _df2, _forecasts):
+    """Figure JSON of the sales and prediction charts for ``product``.
+
+    ``_forecasts`` must be the forecasts of the sales frame hashed into
+    ``digest``, with ``items`` items done so far; ``days`` is the window.
+    """
+    series = plot_series(digest, items, _df2, _forecasts)
+    fig, pred_fig = product_figures(series, product, days)
+    return figure_json(fig), figure_json(pred_fig)
@@ -1,5 +1,14 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+
 import pandas as pd
 
+# reuse the app's parquet sales store
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from sales_store import SalesStore, transactions_store  # noqa: E402
+
 # Path to your large CSV
 file_path = "annex2.csv"
 
@@ -17,17 +26,22 @@ target_items = [
     # add up to ~10 items you care about
 ]
 
-# Prepare an empty dataframe
-filtered_df = pd.DataFrame()
+store = transactions_store()
 
-# Read CSV in chunks
-chunksize = 100_000  # adjust as needed
-for chunk in pd.read_csv(file_path, chunksize=chunksize):
-    chunk_filtered = chunk[chunk["Item Code"].astype(str).isin(target_items)]
-    filtered_df = pd.concat([filtered_df, chunk_filtered], ignore_index=True)
+# Scan the large CSV only once, later runs read from the store. The scan
+# fills a separate store that is renamed into place when it is complete,
+# so an interrupted scan starts over instead of leaving a partial store.
+if not store.exists():
+    partial = SalesStore(store.path.with_name(f"{store.path.name}.partial"))
+    shutil.rmtree(partial.path, ignore_errors=True)
+    chunksize = 100_000  # adjust as needed
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        partial.append(chunk)
+    os.replace(partial.path, store.path)
 
-# Optional: sort by Date
-filtered_df = filtered_df.sort_values(["Item Code", "Date"])
+# Only the target items' partitions are read
+filtered_df = store.read(items=target_items)
+filtered_df["Date"] = filtered_df["Date"].dt.strftime("%Y-%m-%d")
 
 # Save to a smaller CSV
 filtered_df.to_csv("filtered_sales.csv", index=False)
@@ -0,0 +1,418 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from batch_forecast import BatchForecaster
+from forecast_cache import ForecastCache, series_fingerprint
+from forecast_config import (FORECAST_BACKEND, FORECAST_COLUMNS, FORECAST_MODE,
+                             FORECAST_MODES, HORIZON_DAYS, MODEL_CONFIG,
+                             STORE_COLUMN)
+from preprocess import item_series
+from timing import record
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Warm-start fits from an item's previously stored parameters. Off by
+# default: Prophet's L-BFGS often stalls near the old optimum and lands in a
+# worse one, and the fits are no faster (see benchmarks/warm_start_bench.py).
+FORECAST_WARM_START = os.environ.get(
+    "FORECAST_WARM_START", "0").lower() not in ("0", "false", "no")
+
+# Number of worker processes used for per-item fits (1 = serial).
+# Can be overridden with the FORECAST_WORKERS environment variable.
+FORECAST_WORKERS = int(os.environ.get("FORECAST_WORKERS", os.cpu_count() or 1))
+
+# Start method for the worker processes. "spawn" avoids forking the
+# multi-threaded Streamlit server.
+FORECAST_START_METHOD = os.environ.get("FORECAST_START_METHOD", "spawn")
+
+# Cache misses locked and fitted together. Every held series lock is an
+# open file, so this bounds the descriptors a run needs (the soft limit is
+# often 1024, and 256 on macOS).
+FORECAST_LOCK_BATCH = int(os.environ.get("FORECAST_LOCK_BATCH", 128))
+
+# ---------------------------
+# Model
+# ---------------------------
+
+def build_model(regressors=()):
+    # imported here: Prophet (and Stan) take most of a second to load, and
+    # only the processes that actually fit should pay for it
+    from prophet import Prophet
+
+    model = Prophet(yearly_seasonality=False,
+                    changepoint_prior_scale=MODEL_CONFIG['changepoint_prior_scale'],
+                    uncertainty_samples=MODEL_CONFIG['uncertainty_samples'])
+    for seasonality in MODEL_CONFIG['seasonalities']:
+        model.add_seasonality(**seasonality)
+    for regressor in regressors:
+        model.add_regressor(regressor)
+    return model
+
+
+def model_params(model):
+    """Fitted k, m, delta, beta and sigma_obs as a JSON-friendly dict."""
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        params[name] = float(model.params[name][0][0])
+    for name in ['delta', 'beta']:
+        params[name] = model.params[name][0].tolist()
+    return params
+
+
+def stan_init(params):
+    """:func:`model_params` output in the form ``Prophet.fit(init=...)`` takes.
+
+    Prophet compares the shapes of ``delta`` and ``beta`` with the model's
+    and needs them as arrays.
+    """
+    init = dict(params)
+    for name in ['delta', 'beta']:
+        init[name] = np.asarray(params[name], dtype=float)
+    return init
+
+
+def fit_item(unique_code, product_name, item_data, init=None):
+    """Fit one item's daily ``ds``/``y`` frame.
+
+    ``init`` is a dict from :func:`model_params` used as the optimizer's
+    starting point. Where its ``delta`` or ``beta`` no longer match the
+    model (e.g. the number of changepoints or regressors changed) Prophet
+    starts those from its defaults; if the warm fit itself fails the item
+    is refit cold. Columns besides ``ds`` and ``y`` (e.g. ``discount``)
+    become regressors, taken as 0 over the horizon.
+
+    Returns the fitted model, its forecast rows (the ``HORIZON_DAYS``
+    future days, preceded by the fitted history when
+    ``MODEL_CONFIG['include_history']`` is set) and whether the fit really
+    started from the whole of ``init``.
+    """
+    regressors = [column for column in item_data.columns if column not in ('ds', 'y')]
+    model = build_model(regressors)
+    warm = False
+    if init is not None:
+        init = stan_init(init)
+        try:
+            model.fit(item_data, init=init)
+        except Exception:
+            logger.warning("Warm start failed for item %s, fitting cold.",
+                           unique_code, exc_info=True)
+            model = build_model(regressors)
+            model.fit(item_data)
+        else:
+            warm = all(model.params[name][0].shape == init[name].shape
+                       for name in ['delta', 'beta'])
+    else:
+        model.fit(item_data)        # pass the DataFrame directly
+
+    # only the rows we keep go through the uncertainty simulation
+    future = model.make_future_dataframe(
+        periods=HORIZON_DAYS, include_history=MODEL_CONFIG['include_history'])
+    if regressors:
+        future = future.merge(item_data[['ds'] + regressors], on='ds', how='left')
+        future[regressors] = future[regressors].fillna(0)
+    forecast = model.predict(future)
+    forecast["yhat"] = forecast["yhat"].clip(lower=0)
+    forecast["yhat_lower"] = forecast["yhat_lower"].clip(lower=0)
+    forecast["yhat_upper"] = forecast["yhat_upper"].clip(lower=0)
+    forecast['Item Code'] = unique_code
+    forecast['product_name'] = product_name
+    return model, forecast[FORECAST_COLUMNS], warm
+
+
+def _fit_item_safe(task):
+    # one bad item must not take down the whole batch
+    unique_code = task[0]
+    try:
+        start = time.perf_counter()
+        model, forecast, warm = fit_item(*task)
+        seconds = time.perf_counter() - start
+        from prophet.serialize import model_to_json
+        return forecast, model_to_json(model), model_params(model), seconds, warm
+    except Exception:
+        logger.exception("Forecast failed for item %s, skipping.", unique_code)
+        return None
+
+
+# ---------------------------
+# Predictive AI (Prophet)
+# ---------------------------
+
+def iter_tasks(tasks, workers=None):
+    """Fit every task, in a process pool when ``workers`` > 1.
+
+    Yields ``(position, result)`` as each task finishes, where ``result``
+    is a ``(forecast, model_json, params, seconds, warm)`` tuple, or
+    ``None`` for a failed item.
+    """
+    workers = FORECAST_WORKERS if workers is None else workers
+    workers = max(1, min(workers, len(tasks)))
+
+    pending = set(range(len(tasks)))
+    if workers > 1:
+        try:
+            context = multiprocessing.get_context(FORECAST_START_METHOD)
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=context) as pool:
+                futures = {pool.submit(_fit_item_safe, tasks[i]): i
+                           for i in pending}
+                for future in as_completed(futures):
+                    position = futures[future]
+                    result = future.result()
+                    pending.discard(position)
+                    yield position, result
+        except (BrokenProcessPool, OSError):
+            logger.warning(
+                "Process pool unavailable, falling back to serial fits.")
+
+    for position in sorted(pending):
+        yield position, _fit_item_safe(tasks[position])
+
+
+_default_cache = None
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ForecastCache()
+    return _default_cache
+
+
+class ProphetForecaster:
+    """One Prophet model per item, fitted in a process pool.
+
+    Forecasters take the ``(item_code, product_name, ds/y frame)`` tasks
+    from ``preprocess.item_series`` and yield ``(position, forecast)`` as
+    each item is done, with ``forecast`` ``None`` for a failed item and the
+    rows in ``FORECAST_COLUMNS`` order.
+
+    Items whose daily series and model config match a cached entry are
+    served from ``cache`` (``True`` for the default on-disk cache, ``None``
+    or ``False`` to always refit); only the remaining items are fitted.
+    With ``warm_start`` (default ``FORECAST_WARM_START``) those fits start
+    from the item's last stored parameters.
+
+    A miss is only fitted under the cache's lock on its key. Series another
+    session or process is already fitting are waited for and then read from
+    the cache, so concurrent runs over the same data fit each series once.
+    Misses are locked ``FORECAST_LOCK_BATCH`` at a time.
+    """
+
+    name = "prophet"
+
+    def _cached(self, cache, key, task):
+        cached = cache.get_forecast(key)
+        if cached is not None:
+            cached['Item Code'] = task[0]
+            cached['product_name'] = task[1]
+            cached = cached[FORECAST_COLUMNS]
+        return cached
+
+    def _fit(self, tasks, positions, keys, cache, workers, warm_start):
+        fit_tasks = []
+        for i in positions:
+            unique_code, product_name, item_data = tasks[i]
+            init = cache.get_params(unique_code) if cache and warm_start else None
+            fit_tasks.append((unique_code, product_name, item_data, init))
+
+        for position, result in iter_tasks(fit_tasks, workers=workers):
+            i = positions[position]
+            if result is None:
+                yield i, None
+                continue
+            forecast, model_json, params, seconds, warm = result
+            # timed in the worker, recorded here so it reaches the buffer
+            record("forecast.fit_item", seconds, item=tasks[i][0],
+                   rows=len(tasks[i][2]), warm_start=warm)
+            if cache:
+                try:
+                    cache.put(keys[i], forecast, model_json)
+                    cache.put_params(tasks[i][0], params)
+                except OSError:
+                    # the forecast is still good; it just gets refitted next time
+                    logger.warning("Could not cache the fit of item %s.",
+                                   tasks[i][0], exc_info=True)
+            yield i, forecast
+
+    def iter_forecasts(self, tasks, workers=None, cache=True, warm_start=None):
+        if cache is True:
+            cache = default_cache()
+        warm_start = FORECAST_WARM_START if warm_start is None else warm_start
+
+        keys = [None] * len(tasks)
+        misses = []
+        for i, task in enumerate(tasks):
+            if cache:
+                keys[i] = series_fingerprint(task[2], MODEL_CONFIG)
+                cached = self._cached(cache, keys[i], task)
+                if cached is not None:
+                    yield i, cached
+                    continue
+            misses.append(i)
+        if not cache:
+            yield from self._fit(tasks, misses, keys, cache, workers, warm_start)
+            return
+
+        batch = max(1, FORECAST_LOCK_BATCH)
+        for start in range(0, len(misses), batch):
+            yield from self._fit_locked(tasks, misses[start:start + batch], keys,
+                                        cache, workers, warm_start)
+        if misses:
+            cache.evict()
+
+    def _fit_locked(self, tasks, misses, keys, cache, workers, warm_start):
+        locks = {}
+        try:
+            # fit the misses nobody else is fitting right now ...
+            owned, busy = [], []
+            for i in misses:
+                if keys[i] in locks:    # same series twice in this batch
+                    busy.append(i)
+                    continue
+                lock = cache.lock(keys[i])
+                if lock.acquire(blocking=False):
+                    locks[keys[i]] = lock
+                    owned.append(i)
+                else:
+                    busy.append(i)
+            yield from self._fit(tasks, owned, keys, cache, workers, warm_start)
+            for i in owned:
+                locks.pop(keys[i]).release()
+
+            # ... then wait for the others and only fit what they didn't
+            refit = []
+            for i in busy:
+                lock = locks.setdefault(keys[i], cache.lock(keys[i]))
+                lock.acquire()
+                cached = self._cached(cache, keys[i], tasks[i])
+                if cached is None:
+                    refit.append(i)
+                else:
+                    locks.pop(keys[i]).release()
+                    yield i, cached
+            yield from self._fit(tasks, refit, keys, cache, workers, warm_start)
+        finally:
+            for lock in locks.values():
+                lock.release()
+
+
+FORECASTERS = {
+    ProphetForecaster.name: ProphetForecaster,
+    BatchForecaster.name: BatchForecaster,
+}
+
+
+def get_forecaster(backend=None):
+    backend = FORECAST_BACKEND if backend is None else backend
+    try:
+        return FORECASTERS[backend]()
+    except KeyError:
+        raise ValueError(f"Unknown forecast backend: {backend!r}") from None
+
+
+def _store_frames(df):
+    """``(store, frame)`` per store of ``df``, in order of first appearance."""
+    stores = df[STORE_COLUMN].astype(str).str.strip()
+    for store, frame in df.groupby(stores.to_numpy(), sort=False):
+        yield store, frame.drop(columns=STORE_COLUMN)
+
+
+def _with_store(forecast, store, unique_code):
+    forecast = forecast.assign(**{'Item Code': unique_code})
+    forecast.insert(0, STORE_COLUMN, store)
+    return forecast
+
+
+def _iter_store_predictions(df, backend, mode, **options):
+    """Forecast every (store, item) pair of a multi-store ``df``.
+
+    Per-item fits of all stores go to the forecaster in one batch, as items
+    ``<store>/<item code>`` so each pair keeps its own warm-start
+    parameters; identical series still share one cache entry. Category
+    modes run once per store.
+    """
+    if mode == "item":
+        tasks, pairs = [], []
+        for store, frame in _store_frames(df):
+            for unique_code, product_name, item_data in item_series(frame):
+                tasks.append((f"{store}/{unique_code}", product_name, item_data))
+                pairs.append((store, unique_code))
+        forecaster = get_forecaster(backend)
+        total = len(tasks)
+        for position, forecast in forecaster.iter_forecasts(tasks, **options):
+            if forecast is not None:
+                forecast = _with_store(forecast, *pairs[position])
+            yield position, total, forecast
+        return
+
+    from hierarchy import iter_category_predictions
+
+    frames = list(_store_frames(df))
+    sizes = [frame['Item Code'].astype('string').str.strip().dropna().nunique()
+             for _, frame in frames]
+    total = sum(sizes)
+    offset = 0
+    for (store, frame), size in zip(frames, sizes):
+        for position, _, forecast in iter_category_predictions(
+                frame, backend, reconcile=mode == "reconciled", **options):
+            if forecast is not None:
+                forecast = _with_store(forecast, store, forecast['Item Code'].iloc[0])
+            yield offset + position, total, forecast
+        offset += size
+
+
+def iter_predictions(df, backend=None, mode=None, **options):
+    """Forecast every item in ``df``, yielding results as they land.
+
+    Yields ``(position, total, forecast)`` where ``position`` is the item's
+    index in first-appearance order, ``total`` the number of items being
+    forecast and ``forecast`` ``None`` when the item's fit failed.
+    ``options`` (``workers``, ``cache``, ``warm_start``) go to the
+    forecaster picked by ``backend`` (default ``FORECAST_BACKEND``).
+    ``mode`` (default ``FORECAST_MODE``) picks per-item or category-level
+    forecasting, see ``hierarchy.iter_category_predictions``.
+
+    When ``df`` has a ``STORE_COLUMN``, every store's items are forecast
+    separately and the forecasts start with that column.
+    """
+    mode = mode or FORECAST_MODE
+    if mode not in FORECAST_MODES:
+        raise ValueError(f"Unknown forecast mode {mode!r}.")
+    if STORE_COLUMN in df.columns:
+        yield from _iter_store_predictions(df, backend, mode, **options)
+        return
+    if mode in ("category", "reconciled"):
+        from hierarchy import iter_category_predictions
+        yield from iter_category_predictions(
+            df, backend, reconcile=mode == "reconciled", **options)
+        return
+
+    forecaster = get_forecaster(backend)
+    tasks = item_series(df)
+    total = len(tasks)
+    for position, forecast in forecaster.iter_forecasts(tasks, **options):
+        yield position, total, forecast
+
+
+def get_prediction(df, backend=None, **options):
+    """Forecast every item in ``df``; see :func:`iter_predictions`.
+
+    Returns the forecasts of the items that could be fitted, in
+    first-appearance order.
+    """
+    forecasts = {}
+    for position, _, forecast in iter_predictions(df, backend, **options):
+        if forecast is not None:
+            forecasts[position] = forecast
+    return [forecasts[position] for position in sorted(forecasts)]
+
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from forecast_config import ROOT
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Written by forecast_cli.py, loaded by the app at startup.
+FORECAST_ARTIFACT_DIR = os.environ.get(
+    "FORECAST_ARTIFACT_DIR", str(ROOT / "forecast_artifact"))
+
+MANIFEST_FILE = "manifest.json"
+
+# Parquet tables of one run; forecasts are required, the rest optional.
+TABLES = ["forecasts", "replenishment", "purchase_orders"]
+
+
+def write_artifact(tables, path=FORECAST_ARTIFACT_DIR, **manifest):
+    """Write one run's ``tables`` (name -> DataFrame) as Parquet files.
+
+    Each run goes to its own subdirectory and ``manifest.json`` is switched
+    to it last, so a reader never sees a half-written run. ``manifest``
+    (e.g. ``sales_digest``, ``backend``) is stored with it. Older runs are
+    removed. Returns the manifest. Raises ``ValueError`` for a table name
+    not in ``TABLES`` or without ``forecasts``.
+    """
+    unknown = [name for name in tables if name not in TABLES]
+    if unknown:
+        raise ValueError(f"Unknown artifact table(s): {', '.join(unknown)}")
+    if tables.get("forecasts") is None:
+        raise ValueError("An artifact needs the forecasts table.")
+
+    path = Path(path)
+    run = time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+    run_dir = path / run
+    run_dir.mkdir(parents=True, exist_ok=True)
+    for name, table in tables.items():
+        if table is not None:
+            table.to_parquet(run_dir / f"{name}.parquet", index=False)
+
+    manifest = {
+        "run": run,
+        "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "tables": [name for name, table in tables.items() if table is not None],
+        **manifest,
+    }
+    tmp = path / f"{MANIFEST_FILE}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, default=str), encoding="utf-8")
+    os.replace(tmp, path / MANIFEST_FILE)
+
+    for old in path.iterdir():
+        if old.is_dir() and old.name != run:
+            shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def read_manifest(path=FORECAST_ARTIFACT_DIR):
+    """The latest run's manifest, or ``None`` when there is no artifact."""
+    try:
+        return json.loads((Path(path) / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def read_table(manifest, name, path=FORECAST_ARTIFACT_DIR):
+    """One table of the run described by ``manifest``; ``None`` if missing."""
+    if name not in manifest.get("tables", []):
+        return None
+    try:
+        return pd.read_parquet(Path(path) / manifest["run"] / f"{name}.parquet")
+    except FileNotFoundError:
+        return None
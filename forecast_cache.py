@@ -0,0 +1,240 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from forecast_config import ROOT
+
+try:
+    import fcntl
+except ImportError:     # Windows: fits are not deduplicated across processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+FORECAST_CACHE_DIR = os.environ.get(
+    "FORECAST_CACHE_DIR", str(ROOT / ".forecast_cache"))
+FORECAST_CACHE_MAX_MB = float(os.environ.get("FORECAST_CACHE_MAX_MB", 512))
+
+# Longest wait, in seconds, for another process fitting the same series
+# before fitting it anyway.
+FORECAST_LOCK_TIMEOUT = float(os.environ.get("FORECAST_LOCK_TIMEOUT", 600))
+
+MODEL_SUFFIX = ".model.json"
+FORECAST_SUFFIX = ".forecast.pkl"
+PARAMS_SUFFIX = ".params.json"
+LOCK_SUFFIX = ".lock"
+
+
+def series_fingerprint(item_data, config):
+    """Hash an item's daily series and regressors together with the model config."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    ds = pd.to_datetime(item_data["ds"]).to_numpy(dtype="datetime64[ns]")
+    digest.update(ds.view("int64").tobytes())
+    for column in item_data.columns.drop("ds"):
+        if column != "y":
+            digest.update(str(column).encode("utf-8"))
+        digest.update(item_data[column].to_numpy(dtype="float64").tobytes())
+    return digest.hexdigest()
+
+
+def content_digest(data):
+    """SHA-256 of raw bytes (e.g. ``UploadedFile.getvalue()``)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def frame_digest(df):
+    """Content hash of a DataFrame, used to key the app caches and artifacts."""
+    if df is None or df.empty:
+        return "empty"
+    hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.sha256(hashed.tobytes())
+    digest.update(",".join(map(str, df.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def replace_file(file, write):
+    """Write ``file`` through ``write(tmp_path)`` and swap it in atomically.
+
+    The temp file is unique to this call, so threads of one process (every
+    app session shares the server's pid) can write the same entry at once.
+    """
+    fd, tmp = tempfile.mkstemp(dir=file.parent, prefix=f".{file.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, file)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class SeriesLock:
+    """Exclusive lock on one cache key, held across threads and processes.
+
+    An advisory ``flock`` on ``<key>.lock``, so every app session, worker
+    and CLI run sharing a cache directory fits a given series only once.
+    The lock goes away with its file descriptor, i.e. also when the holder
+    crashes. Only a held lock keeps its file open.
+    """
+
+    poll_seconds = 0.1
+
+    def __init__(self, file):
+        self.file = Path(file)
+        self._fd = None
+
+    def _is_current(self, fd):
+        # :meth:`remove` may unlink the file between our open and flock;
+        # only a lock on the file still at the path counts
+        try:
+            return os.fstat(fd).st_ino == os.stat(self.file).st_ino
+        except FileNotFoundError:
+            return False
+
+    def acquire(self, blocking=True, timeout=FORECAST_LOCK_TIMEOUT):
+        """Take the lock; ``False`` if it is held elsewhere (after ``timeout``)."""
+        if self._fd is not None:
+            return True
+        deadline = time.monotonic() + timeout
+        while True:
+            fd = os.open(self.file, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is None:
+                self._fd = fd
+                return True
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                if not blocking or time.monotonic() >= deadline:
+                    return False
+                time.sleep(self.poll_seconds)
+                continue
+            if self._is_current(fd):
+                self._fd = fd
+                return True
+            os.close(fd)
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)      # closing the descriptor drops the lock
+            self._fd = None
+
+    def remove(self):
+        """Delete the lock file unless someone holds it; ``True`` if deleted."""
+        if not self.acquire(blocking=False):
+            return False
+        try:
+            self.file.unlink()
+        except OSError:     # e.g. still open elsewhere on Windows
+            return False
+        finally:
+            self.release()
+        return True
+
+
+class ForecastCache:
+    """On-disk store of fitted Prophet models and their forecast frames.
+
+    Entries are keyed by :func:`series_fingerprint`. Reading an entry bumps
+    its modification time, and the least recently used entries are removed
+    once the directory grows past ``max_mb``.
+
+    The directory is the model registry shared by every session, store and
+    batch run: a series seen before is never refitted, and :meth:`lock`
+    keeps two of them from fitting the same series at once.
+    """
+
+    def __init__(self, path=FORECAST_CACHE_DIR, max_mb=FORECAST_CACHE_MAX_MB):
+        self.path = Path(path)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _files(self, key):
+        return self.path / f"{key}{MODEL_SUFFIX}", self.path / f"{key}{FORECAST_SUFFIX}"
+
+    def lock(self, key):
+        """A :class:`SeriesLock` for ``key``; :meth:`evict` removes unused ones."""
+        return SeriesLock(self.path / f"{key}{LOCK_SUFFIX}")
+
+    def get_forecast(self, key):
+        model_file, forecast_file = self._files(key)
+        try:
+            forecast = pd.read_pickle(forecast_file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Unreadable cache entry %s, ignoring.", key)
+            return None
+        for file in (model_file, forecast_file):
+            try:
+                os.utime(file)
+            except FileNotFoundError:
+                pass
+        return forecast
+
+    def put(self, key, forecast, model_json=None):
+        model_file, forecast_file = self._files(key)
+        # write to a temp file first so readers never see half an entry
+        replace_file(forecast_file, forecast.to_pickle)
+        if model_json is not None:
+            replace_file(model_file, lambda tmp: Path(tmp).write_text(
+                model_json, encoding="utf-8"))
+
+    def _params_file(self, item_code):
+        safe_code = re.sub(r"[^0-9A-Za-z_-]", "_", str(item_code).strip())
+        return self.path / f"item-{safe_code}{PARAMS_SUFFIX}"
+
+    def get_params(self, item_code):
+        """Latest fitted parameters stored for ``item_code``, if any."""
+        try:
+            return json.loads(self._params_file(item_code).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put_params(self, item_code, params):
+        # one small file per item, overwritten on every fit, so these are
+        # left out of the size-based eviction
+        replace_file(self._params_file(item_code), lambda tmp: Path(tmp).write_text(
+            json.dumps(params), encoding="utf-8"))
+
+    def evict(self):
+        entries = []
+        total = 0
+        for file in self.path.iterdir():
+            if file.name.endswith(LOCK_SUFFIX):
+                # one per series ever fitted; recreated on the next lock()
+                SeriesLock(file).remove()
+                continue
+            if not file.name.endswith((MODEL_SUFFIX, FORECAST_SUFFIX)):
+                continue
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+            total += stat.st_size
+
+        # oldest first
+        for _, size, file in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                file.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
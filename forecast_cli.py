@@ -0,0 +1,146 @@
+"""Headless batch forecasting for nightly runs.
+
+Fits every item of a sales CSV or Parquet file (or of the sales store) with
+the app's forecasting code and writes the forecasts, plus the replenishment
+plan and purchase orders when a stock file is given, to the Parquet artifact
+the app loads at startup. Files with a ``Store`` column are planned per store.
+For example::
+
+    python forecast_cli.py --sales clean_sample_data/sales_data.csv \
+        --stock clean_sample_data/current_stock.csv --workers 8
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Nothing here plots: keep Prophet from importing matplotlib/plotly (it
+# treats both as optional). Spawned workers re-run this module, so they
+# skip them too.
+for _name in ("matplotlib", "plotly"):
+    sys.modules.setdefault(_name, None)
+logging.getLogger("prophet.plot").setLevel(logging.CRITICAL)
+
+import pandas as pd  # noqa: E402
+
+from forecast import iter_predictions  # noqa: E402
+from forecast_artifact import FORECAST_ARTIFACT_DIR, write_artifact  # noqa: E402
+from forecast_cache import content_digest, frame_digest  # noqa: E402
+from forecast_config import (FORECAST_BACKEND, FORECAST_COLUMNS,  # noqa: E402
+                             FORECAST_MODE, FORECAST_MODES, STORE_COLUMN)
+from ingest import read_sales, read_stock  # noqa: E402
+from inventory import forecast_summary, inventory_summary  # noqa: E402
+from pricing import load_price_index, unit_costs  # noqa: E402
+from replenishment import purchase_orders, replenishment_plan  # noqa: E402
+from sales_store import (SALES_STORE_DIR, daily_sales_store,  # noqa: E402
+                         load_daily_sales)
+
+logger = logging.getLogger("forecast_cli")
+
+
+def load_sales(args):
+    """Daily sales, their digest (as the app computes it) and selling prices."""
+    if args.sales is not None:
+        daily, selling_prices = read_sales(args.sales, prices=True)
+        digest = content_digest(args.sales.read_bytes())
+        return daily, digest, selling_prices
+    daily = load_daily_sales(path=args.store)
+    return daily, frame_digest(daily), None
+
+
+def run_forecasts(daily, backend, mode, workers, cache):
+    forecasts = {}
+    failed = 0
+    for position, total, forecast in iter_predictions(
+            daily, backend, mode, workers=workers, cache=cache):
+        if forecast is None:
+            failed += 1
+        else:
+            forecasts[position] = forecast
+        done = len(forecasts) + failed
+        if done == total or done % 50 == 0:
+            logger.info("Forecast %d/%d items (%d failed).", done, total, failed)
+    if not forecasts:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+    return pd.concat([forecasts[position] for position in sorted(forecasts)],
+                     ignore_index=True)
+
+
+def replenish(stock, forecasts, selling_prices=None):
+    """Replenishment plan and purchase orders, per store for multi-store data."""
+    index = load_price_index()
+    if STORE_COLUMN not in forecasts.columns:
+        plan = replenishment_plan(
+            inventory_summary(stock, forecast_summary(forecasts)))
+        return (plan.reset_index(),
+                purchase_orders(plan, unit_costs(forecasts, index, selling_prices)))
+
+    plans, orders = [], []
+    for store, store_forecasts in forecasts.groupby(STORE_COLUMN, sort=False):
+        store_stock = stock
+        if STORE_COLUMN in stock.columns:
+            store_stock = stock[(stock[STORE_COLUMN].astype(str) == store).to_numpy()]
+        plan = replenishment_plan(inventory_summary(
+            store_stock.drop(columns=STORE_COLUMN, errors='ignore'),
+            forecast_summary(store_forecasts)))
+        costs = unit_costs(store_forecasts, index, selling_prices)
+        for frames, table in ((plans, plan.reset_index()),
+                              (orders, purchase_orders(plan, costs))):
+            table.insert(0, STORE_COLUMN, store)
+            frames.append(table)
+    return pd.concat(plans, ignore_index=True), pd.concat(orders, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--sales", type=Path, help="transaction-level sales CSV or Parquet file")
+    source.add_argument("--store", default=SALES_STORE_DIR,
+                        help="sales store to read when no sales file is given")
+    parser.add_argument("--stock", type=Path, default=None,
+                        help="stock CSV; adds the replenishment plan and orders")
+    parser.add_argument("--backend", default=FORECAST_BACKEND,
+                        help="forecasting backend (prophet or numpy)")
+    parser.add_argument("--mode", default=FORECAST_MODE,
+                        choices=FORECAST_MODES,
+                        help="per-item fits or category-level top-down fits")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="refit every item, ignoring the forecast cache")
+    parser.add_argument("--output", default=FORECAST_ARTIFACT_DIR)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.sales is None and not daily_sales_store(args.store).exists():
+        parser.error(f"no sales store at {args.store}; pass --sales")
+
+    start = time.perf_counter()
+    daily, digest, selling_prices = load_sales(args)
+    if daily.empty:
+        parser.error("no sales to forecast")
+    logger.info("Loaded %d daily rows for %d items.",
+                len(daily), daily['Item Code'].nunique())
+
+    forecasts = run_forecasts(daily, args.backend, args.mode, args.workers,
+                              None if args.no_cache else True)
+    forecasts['Item Code'] = forecasts['Item Code'].astype(str)
+    tables = {"forecasts": forecasts}
+
+    if args.stock is not None:
+        tables["replenishment"], tables["purchase_orders"] = replenish(
+            read_stock(args.stock), forecasts, selling_prices)
+
+    manifest = write_artifact(
+        tables, args.output, sales_digest=digest, backend=args.backend,
+        mode=args.mode,
+        items=len(forecasts.drop_duplicates(
+            [name for name in [STORE_COLUMN, 'Item Code'] if name in forecasts.columns])),
+        source=str(args.sales or args.store),
+        seconds=round(time.perf_counter() - start, 1))
+    logger.info("Wrote run %s to %s.", manifest["run"], args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+from pathlib import Path
+
+# ---------------------------
+# Forecast Settings
+# ---------------------------
+# Kept free of heavy imports so the UI and the batch backend can use them
+# without loading Prophet.
+
+# The checkout. Default data files and output directories resolve against
+# it, so runs started from another directory (e.g. by cron) still find them.
+ROOT = Path(__file__).resolve().parent
+
+HORIZON_DAYS = 30
+
+FORECAST_COLUMNS = ['Item Code', 'product_name',
+                    'ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+# Optional outlet column of the sales and stock files. With it, every
+# (store, Item Code) pair is forecast on its own and forecast frames start
+# with this column.
+STORE_COLUMN = 'Store'
+
+# Keep the in-sample fitted values of the history in forecast frames. Off
+# by default: the app and the exports only read the HORIZON_DAYS future
+# rows, and predicting just those is several times faster.
+FORECAST_HISTORY = os.environ.get(
+    "FORECAST_HISTORY", "0").lower() not in ("0", "false", "no")
+
+# Simulations behind Prophet's yhat_lower/yhat_upper (Prophet's default is
+# 1000; 200 moves the 80% band by a few percent at most).
+UNCERTAINTY_SAMPLES = int(os.environ.get("UNCERTAINTY_SAMPLES", 200))
+
+# Everything that changes a fit or its forecast rows; part of the forecast
+# cache key.
+MODEL_CONFIG = {
+    'changepoint_prior_scale': 0.001,
+    'seasonalities': [
+        {'name': 'yearly', 'period': 365.25, 'fourier_order': 9},
+        {'name': 'weekly', 'period': 7, 'fourier_order': 3},
+        {'name': 'monthly', 'period': 30.5, 'fourier_order': 5},
+    ],
+    'horizon_days': HORIZON_DAYS,
+    'include_history': FORECAST_HISTORY,
+    'uncertainty_samples': UNCERTAINTY_SAMPLES,
+}
+
+# Forecasting backend: "prophet" (one Stan fit per item) or "numpy"
+# (batched least squares over the whole catalog).
+FORECAST_BACKEND = os.environ.get("FORECAST_BACKEND", "prophet")
+
+# "item" fits every item on its own; "category" fits one model per annex1
+# category and splits it by recent sales shares; "reconciled" also fits the
+# items and splits the category forecast along those fits.
+FORECAST_MODES = ["item", "category", "reconciled"]
+FORECAST_MODE = os.environ.get("FORECAST_MODE", "item")
@@ -0,0 +1,183 @@
+import functools
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from forecast_cache import replace_file
+from forecast_config import FORECAST_COLUMNS, STORE_COLUMN
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Directory for memory-mapped forecast tables. When set, the app writes each
+# finished forecast there once and every session (and every server process
+# on the machine) reads the same read-only pages; unset keeps them in RAM.
+FORECAST_MEMMAP_DIR = os.environ.get("FORECAST_MEMMAP_DIR") or None
+
+# Tables kept in FORECAST_MEMMAP_DIR; the least recently opened go first.
+FORECAST_MEMMAP_KEEP = int(os.environ.get("FORECAST_MEMMAP_KEEP", 32))
+
+VALUE_COLUMNS = ['yhat', 'yhat_lower', 'yhat_upper']
+ITEMS_FILE = "items.parquet"
+ARRAY_FILES = ["offsets", "day", "values"]
+
+
+class ForecastTable:
+    """Forecast rows packed into item-indexed float32 arrays.
+
+    ``items`` is the dimension table, one row per forecast series with its
+    ``Item Code``, ``product_name`` (and ``Store`` for multi-store data).
+    Series ``i`` owns rows ``offsets[i]:offsets[i + 1]`` of ``day`` (int32
+    days since the epoch) and ``values`` (float32 ``yhat``, ``yhat_lower``,
+    ``yhat_upper``), so codes and names are stored once instead of per row.
+    Tables are never modified; sessions share one instance.
+    """
+
+    def __init__(self, items, offsets, day, values):
+        self.items = items
+        self.offsets = offsets
+        self.day = day
+        self.values = values
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Pack per-series forecast frames (as the forecasters yield them)."""
+        frames = [frame for frame in frames if frame is not None and not frame.empty]
+        if not frames:
+            return cls.from_frame(None)
+        keys = [name for name in [STORE_COLUMN, 'Item Code', 'product_name']
+                if name in frames[0].columns]
+        items = pd.DataFrame([frame[keys].iloc[0] for frame in frames])
+        lengths = [len(frame) for frame in frames]
+        ds = np.concatenate([frame['ds'].to_numpy(dtype='datetime64[D]')
+                             for frame in frames])
+        values = np.concatenate([frame[VALUE_COLUMNS].to_numpy(dtype=np.float32)
+                                 for frame in frames])
+        return cls(items.reset_index(drop=True), np.r_[0, np.cumsum(lengths)],
+                   ds.astype(np.int32), values)
+
+    @classmethod
+    def from_frame(cls, forecasts):
+        """Pack a concatenated forecast frame (e.g. a forecast_cli.py table)."""
+        if forecasts is None or forecasts.empty:
+            return cls(pd.DataFrame(columns=['Item Code', 'product_name']),
+                       np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32),
+                       np.zeros((0, len(VALUE_COLUMNS)), dtype=np.float32))
+        keys = [name for name in [STORE_COLUMN, 'Item Code']
+                if name in forecasts.columns]
+        return cls.from_frames(
+            [frame for _, frame in forecasts.groupby(keys, sort=False, observed=True)])
+
+    @property
+    def empty(self):
+        return len(self.day) == 0
+
+    def __len__(self):
+        return len(self.day)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the arrays and the dimension table."""
+        return (self.offsets.nbytes + self.day.nbytes + self.values.nbytes
+                + int(self.items.memory_usage(deep=True).sum()))
+
+    def to_frame(self, store=None):
+        """Forecast rows as a frame, optionally only those of ``store``.
+
+        Columns are ``FORECAST_COLUMNS`` (led by ``Store`` when the table has
+        one) with float64 values, like the forecasters' own frames.
+        """
+        series = np.arange(len(self.items))
+        if store is not None and STORE_COLUMN in self.items.columns:
+            series = np.flatnonzero(self.items[STORE_COLUMN].astype(str) == store)
+        starts = self.offsets[series]
+        lengths = self.offsets[series + 1] - starts
+        # row numbers of the chosen series, without a Python loop
+        rows = (np.repeat(starts - np.cumsum(np.r_[0, lengths[:-1]]), lengths)
+                + np.arange(lengths.sum()))
+        owner = np.repeat(series, lengths)
+
+        frame = pd.DataFrame({
+            name: self.items[name].to_numpy()[owner] for name in self.items.columns})
+        frame['ds'] = self.day[rows].astype('datetime64[D]').astype('datetime64[ns]')
+        for column, values in zip(VALUE_COLUMNS, self.values[rows].T):
+            frame[column] = values.astype(float)
+        columns = [STORE_COLUMN] if STORE_COLUMN in frame.columns else []
+        return frame[columns + FORECAST_COLUMNS]
+
+    # ---------------------------
+    # Memory Mapping
+    # ---------------------------
+
+    def save(self, path):
+        """Write the table to directory ``path`` for :meth:`open`."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ARRAY_FILES:
+            # written next to the target first so readers never see half a file
+            replace_file(path / f"{name}.npy", functools.partial(
+                _save_array, getattr(self, name)))
+        replace_file(path / ITEMS_FILE, functools.partial(
+            self.items.to_parquet, index=False))
+
+    @classmethod
+    def open(cls, path):
+        """A table saved by :meth:`save`, with its arrays memory-mapped read-only."""
+        path = Path(path)
+        arrays = [np.load(path / f"{name}.npy", mmap_mode='r') for name in ARRAY_FILES]
+        return cls(pd.read_parquet(path / ITEMS_FILE), *arrays)
+
+
+def _save_array(array, file):
+    # through a file object: np.save would add ``.npy`` to a temp path
+    with open(file, "wb") as handle:
+        np.save(handle, array)
+
+
+def shared_table(table, key, path=FORECAST_MEMMAP_DIR, keep=FORECAST_MEMMAP_KEEP):
+    """``table`` memory-mapped from ``path/key`` when ``path`` is set.
+
+    The first caller writes the files; later calls (from any session or
+    process) just map them, so ``key`` must change with anything that
+    changes the table. Returns ``table`` itself without ``path``, or if
+    the files vanish under a concurrent :func:`prune_tables`.
+    """
+    if path is None:
+        return table
+    directory = Path(path) / key
+    if not (directory / ITEMS_FILE).exists():
+        table.save(directory)
+        prune_tables(path, keep)
+    try:
+        opened = ForecastTable.open(directory)
+        os.utime(directory)
+    except FileNotFoundError:
+        return table
+    return opened
+
+
+def prune_tables(path=FORECAST_MEMMAP_DIR, keep=FORECAST_MEMMAP_KEEP):
+    """Delete all but the ``keep`` most recently opened tables under ``path``.
+
+    Sessions that already mapped a deleted table keep reading it; the
+    pages go away with the last mapping.
+    """
+    tables = []
+    for directory in Path(path).iterdir():
+        try:
+            tables.append((directory.stat().st_mtime, directory))
+        except FileNotFoundError:
+            continue
+    for _, directory in sorted(tables, reverse=True)[keep:]:
+        # the items file marks a complete table, so it goes first
+        try:
+            (directory / ITEMS_FILE).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError:     # still mapped on Windows
+            continue
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,187 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from forecast import get_forecaster
+from forecast_config import FORECAST_COLUMNS
+from inventory import load_categories
+from preprocess import (MIN_HISTORY_DAYS, clean_sales, clip_outliers,
+                        daily_item_sales, item_series)
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Items split their category's forecast by their share of its sales over
+# the last FORECAST_SHARE_DAYS days.
+FORECAST_SHARE_DAYS = int(os.environ.get("FORECAST_SHARE_DAYS", 28))
+
+UNKNOWN_CATEGORY = 'Unknown'
+
+
+# ---------------------------
+# Category Series
+# ---------------------------
+
+def category_sales(df, categories=None):
+    """Daily item sales with each item's ``category`` and product name.
+
+    Returns ``(daily, names)``: ``daily`` has ``Item Code``, ``category``,
+    ``Date`` and ``Quantity Sold (kilo)`` (days with a negative total are
+    dropped and outliers clipped, as in ``item_series``) and ``names`` maps
+    each item code to its product name, in order of first appearance in
+    ``df``.
+    """
+    if categories is None:
+        categories = load_categories()
+    data = clean_sales(df)
+    daily = daily_item_sales(data)
+    daily = daily[daily['Quantity Sold (kilo)'].notna()
+                  & (daily['Quantity Sold (kilo)'] >= 0)]
+    daily = daily.assign(**{'Quantity Sold (kilo)': clip_outliers(daily)})
+
+    codes = data['Item Code'].dropna().unique()
+    if 'product_name' in data.columns:
+        names = data.groupby('Item Code', sort=False)['product_name'].first()
+        names = names.reindex(codes)
+    else:
+        names = pd.Series(codes, index=codes)
+    names = names.fillna(pd.Series(codes, index=codes))
+
+    item_category = categories.reindex(daily['Item Code'].to_numpy())
+    daily = daily.assign(category=item_category.fillna(UNKNOWN_CATEGORY).to_numpy())
+    return daily, names
+
+
+def category_series(daily, min_rows=MIN_HISTORY_DAYS):
+    """Per-category ``ds``/``y`` frames as forecaster tasks.
+
+    Task codes are ``category:<name>`` so cached parameters never collide
+    with an item's.
+    """
+    totals = (daily.groupby(['category', 'Date'], sort=True)['Quantity Sold (kilo)']
+              .sum().reset_index()
+              .rename(columns={'Date': 'ds', 'Quantity Sold (kilo)': 'y'}))
+    tasks = []
+    for category, frame in totals.groupby('category', sort=True):
+        if len(frame) >= min_rows:
+            tasks.append((f"category:{category}", category,
+                          frame[['ds', 'y']].reset_index(drop=True)))
+    return tasks
+
+
+def sales_shares(daily, days=FORECAST_SHARE_DAYS):
+    """Each item's share of its category's sales over the last ``days``.
+
+    Categories with no sales in that window use their whole history, and
+    ones with no sales at all split evenly. Indexed by ``Item Code``.
+    """
+    quantity = daily['Quantity Sold (kilo)']
+    recent = daily['Date'] > daily['Date'].max() - pd.Timedelta(days=days)
+    items = daily.groupby('Item Code', sort=False).agg(category=('category', 'first'))
+    items['recent'] = quantity.where(recent, 0).groupby(daily['Item Code']).sum()
+    items['total'] = quantity.groupby(daily['Item Code']).sum()
+
+    by_category = items.groupby('category')
+    recent_total = by_category['recent'].transform('sum')
+    total = by_category['total'].transform('sum')
+    count = by_category['total'].transform('size')
+    share = (items['recent'] / recent_total).where(
+        recent_total > 0, (items['total'] / total).where(total > 0, 1 / count))
+    return share.rename('share')
+
+
+# ---------------------------
+# Disaggregation
+# ---------------------------
+
+def disaggregate(category_forecast, codes, names, shares, item_forecasts=None):
+    """Split one category forecast into per-item forecast frames.
+
+    Every forecast day is split by the items' ``shares``. With
+    ``item_forecasts`` (code -> per-item fit) the split follows those fits
+    instead wherever they cover the day, scaled so the items still add up
+    to the category forecast; items without a fit keep their share.
+    Returns one frame per code in ``FORECAST_COLUMNS`` order.
+    """
+    ds = category_forecast['ds'].to_numpy()
+    total = category_forecast['yhat'].to_numpy(dtype=float)
+    share = shares.reindex(codes).fillna(0).to_numpy(dtype=float)
+
+    weights = share[:, None] * total[None, :]
+    for row, code in enumerate(codes):
+        fit = (item_forecasts or {}).get(code)
+        if fit is not None:
+            fitted = fit.set_index('ds')['yhat'].reindex(ds).to_numpy(dtype=float)
+            covered = ~np.isnan(fitted)
+            weights[row, covered] = np.clip(fitted[covered], 0, None)
+
+    # days where every weight is 0 fall back to the plain shares
+    column_total = weights.sum(axis=0)
+    empty = column_total <= 0
+    weights[:, empty] = share[:, None]
+    column_total[empty] = share.sum() or 1.0
+    proportions = weights / column_total
+
+    forecasts = []
+    for row, code in enumerate(codes):
+        forecasts.append(pd.DataFrame({
+            'Item Code': code,
+            'product_name': names.get(code, code),
+            'ds': ds,
+            'yhat': proportions[row] * total,
+            'yhat_lower': proportions[row] * category_forecast['yhat_lower'].to_numpy(),
+            'yhat_upper': proportions[row] * category_forecast['yhat_upper'].to_numpy(),
+        }, columns=FORECAST_COLUMNS))
+    return forecasts
+
+
+def iter_category_predictions(df, backend=None, reconcile=False, categories=None,
+                              share_days=FORECAST_SHARE_DAYS, **options):
+    """Forecast every item in ``df`` top-down from its category.
+
+    One model is fitted per annex1 category on the summed daily sales, then
+    split to the items by :func:`sales_shares`, so items with too little
+    history for their own fit are covered too. With ``reconcile`` every
+    item with enough history is also fitted and the split follows those
+    fits (see :func:`disaggregate`). Yields ``(position, total, forecast)``
+    like ``forecast.iter_predictions``; ``forecast`` is ``None`` for items
+    whose category fit failed.
+    """
+    daily, names = category_sales(df, categories)
+    shares = sales_shares(daily, share_days)
+    category_tasks = category_series(daily)
+    item_tasks = item_series(df) if reconcile else []
+
+    forecaster = get_forecaster(backend)
+    category_forecasts = {}
+    item_forecasts = {}
+    for i, forecast in forecaster.iter_forecasts(category_tasks + item_tasks, **options):
+        if i < len(category_tasks):
+            category_forecasts[category_tasks[i][1]] = forecast
+        elif forecast is not None:
+            item_forecasts[item_tasks[i - len(category_tasks)][0]] = forecast
+    logger.info("Fitted %d categories and %d items for %d items.",
+                len(category_tasks), len(item_tasks), len(names))
+
+    positions = {code: position for position, code in enumerate(names.index)}
+    item_category = daily.groupby('Item Code', sort=False)['category'].first()
+    total = len(names)
+    for category, codes in item_category.groupby(item_category, sort=False):
+        codes = list(codes.index)
+        category_forecast = category_forecasts.get(category)
+        if category_forecast is None:
+            for code in codes:
+                yield positions[code], total, None
+            continue
+        for code, forecast in zip(codes, disaggregate(
+                category_forecast, codes, names, shares, item_forecasts)):
+            yield positions[code], total, forecast
+
+    # items without a single valid sales day
+    for code in names.index.difference(item_category.index):
+        yield positions[code], total, None
@@ -0,0 +1,183 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+from preprocess import (DISCOUNT_COLUMN, DISCOUNTED_COLUMN, RETURN_COLUMN,
+                        discounted_quantity, net_returns)
+from pricing import (SALES_VALUE_COLUMN, SELLING_PRICE_COLUMN, SOLD_COLUMN,
+                     selling_prices)
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+CHUNK_ROWS = 200_000
+
+# First bytes of every Parquet file; anything else is read as CSV.
+PARQUET_MAGIC = b"PAR1"
+
+# Columns kept from a sales upload. Everything else (Time, price, ...) is
+# dropped while reading.
+SALES_SCHEMA = {
+    'Store': 'category',      # optional, for multi-store files
+    'Item Code': 'category',
+    'product_name': 'category',
+    'Date': 'category',       # few distinct values per chunk, parsed below
+    'Quantity Sold (kilo)': 'float32',
+    RETURN_COLUMN: 'category',      # optional, returns are netted out
+    DISCOUNT_COLUMN: 'category',    # optional, summed into DISCOUNTED_COLUMN
+    SELLING_PRICE_COLUMN: 'float32',    # only read for ``prices=True``
+}
+SALES_REQUIRED = ['Item Code', 'Date', 'Quantity Sold (kilo)']
+
+STOCK_SCHEMA = {
+    'Store': 'category',
+    'Item Code': 'string',
+    'product_name': 'category',
+    'supplier_name': 'category',
+}
+
+
+def _rewind(file):
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+
+def is_parquet(file):
+    """Whether ``file`` (a path or binary file object) holds Parquet data."""
+    if hasattr(file, "read"):
+        head = file.read(len(PARQUET_MAGIC))
+        _rewind(file)
+    else:
+        with open(file, "rb") as handle:
+            head = handle.read(len(PARQUET_MAGIC))
+    return head == PARQUET_MAGIC
+
+
+def _header_map(file):
+    """Map stripped column names to the names actually used in ``file``."""
+    if is_parquet(file):
+        header = pq.ParquetFile(file).schema_arrow.names
+    else:
+        header = pd.read_csv(file, nrows=0).columns
+    _rewind(file)
+    return {str(column).strip(): column for column in header}
+
+
+def _read_chunks(file, usecols, dtype, chunksize):
+    """``chunksize``-row frames of ``usecols`` from a sales CSV or Parquet file."""
+    if not is_parquet(file):
+        yield from pd.read_csv(file, usecols=usecols, dtype=dtype, chunksize=chunksize)
+        return
+    for batch in pq.ParquetFile(file).iter_batches(batch_size=chunksize, columns=usecols):
+        chunk = batch.to_pandas()
+        for column, kind in dtype.items():
+            # codes stored as numbers must come out as the strings a CSV gives
+            if kind == 'category' and not pd.api.types.is_string_dtype(chunk[column]):
+                chunk[column] = chunk[column].astype('string')
+        yield chunk.astype(dtype)
+
+
+def read_sales(file, chunksize=CHUNK_ROWS, prices=False):
+    """Stream a transaction-level sales CSV or Parquet file into daily totals per item.
+
+    The file is read ``chunksize`` rows (Parquet: record batches) at a time with a compact schema and
+    each chunk is reduced to (``Item Code``, ``product_name``, ``Date``)
+    totals straight away, so the raw rows are never held in memory at once.
+    Returns a frame with categorical codes/names, ``datetime64`` dates and
+    ``float32`` quantities, sorted by item code and date. A ``Store`` column
+    is kept (totals are per store) and sorted on first. Return rows count
+    negative, and with a discount flag the kilos sold at a discount are
+    totalled in ``DISCOUNTED_COLUMN`` too.
+
+    With ``prices``, returns ``(daily, selling_prices)``: the same pass
+    also totals the sold kilos and their value at the selling price, for
+    :func:`pricing.selling_prices` (empty without a selling price column).
+    """
+    columns = _header_map(file)
+    missing = [name for name in SALES_REQUIRED if name not in columns]
+    if missing:
+        raise ValueError(f"Sales file is missing column(s): {', '.join(missing)}")
+
+    wanted = [name for name in SALES_SCHEMA if name in columns
+              and (prices or name != SELLING_PRICE_COLUMN)]
+    usecols = [columns[name] for name in wanted]
+    dtype = {columns[name]: SALES_SCHEMA[name] for name in wanted}
+    keys = [name for name in ['Store', 'Item Code', 'product_name', 'Date']
+            if name in wanted]
+    totals = ['Quantity Sold (kilo)']
+    if DISCOUNT_COLUMN in wanted:
+        totals.append(DISCOUNTED_COLUMN)
+    value_totals = []
+    if SELLING_PRICE_COLUMN in wanted:
+        value_totals = [SOLD_COLUMN, SALES_VALUE_COLUMN]
+
+    parts = []
+    for chunk in _read_chunks(file, usecols, dtype, chunksize):
+        chunk.columns = chunk.columns.str.strip()
+        for name in ['Store', 'Item Code']:
+            if name in chunk.columns:
+                stripped = chunk[name].cat.categories.str.strip()
+                if stripped.is_unique:
+                    chunk[name] = chunk[name].cat.rename_categories(stripped)
+                else:   # " 1" and "1" become one category, so strip the values
+                    chunk[name] = chunk[name].astype('string').str.strip().astype('category')
+        # parse each distinct date once; to_datetime keeps the categorical
+        chunk['Date'] = pd.to_datetime(
+            chunk['Date'], errors='coerce').astype('datetime64[ns]')
+        chunk = chunk[chunk['Date'].notna()]
+        if RETURN_COLUMN in chunk.columns:
+            chunk['Quantity Sold (kilo)'] = net_returns(
+                chunk['Quantity Sold (kilo)'], chunk[RETURN_COLUMN])
+        if DISCOUNT_COLUMN in chunk.columns:
+            chunk[DISCOUNTED_COLUMN] = discounted_quantity(
+                chunk['Quantity Sold (kilo)'], chunk[DISCOUNT_COLUMN])
+        if value_totals:
+            # float64: value sums over a whole file would drift in float32
+            chunk[SOLD_COLUMN] = chunk['Quantity Sold (kilo)'].clip(lower=0).astype(float)
+            chunk[SALES_VALUE_COLUMN] = chunk[SOLD_COLUMN] * chunk[SELLING_PRICE_COLUMN]
+        # dropna=False: a row without a product_name still counts
+        parts.append(
+            chunk.groupby(keys, observed=True, sort=False, dropna=False)
+            [totals + value_totals].sum()
+            .reset_index()
+        )
+
+    if not parts:
+        empty = {name: pd.Series(dtype=SALES_SCHEMA[name]) for name in keys}
+        empty['Date'] = pd.Series(dtype='datetime64[ns]')
+        for name in totals:
+            empty[name] = pd.Series(dtype='float32')
+        daily = pd.DataFrame(empty)
+        return (daily, selling_prices(None)) if prices else daily
+
+    # a day can straddle two chunks, so add the partial totals up again
+    for part in parts:
+        for name in keys:
+            if name != 'Date':
+                part[name] = part[name].astype(object)
+    daily = (
+        pd.concat(parts, ignore_index=True)
+        .groupby(keys, observed=True, sort=True, dropna=False)
+        [totals + value_totals].sum()
+        .reset_index()
+    )
+    for name in keys:
+        if name != 'Date':
+            daily[name] = daily[name].astype('category')
+    daily[totals] = daily[totals].astype('float32')
+    if not prices:
+        return daily
+    return daily.drop(columns=value_totals), selling_prices(daily)
+
+
+def read_stock(file):
+    """Read a stock CSV with stripped headers and compact dtypes."""
+    columns = _header_map(file)
+    dtype = {columns[name]: kind for name, kind in STOCK_SCHEMA.items() if name in columns}
+    stock = pd.read_csv(file, dtype=dtype)
+    stock.columns = stock.columns.str.strip()
+    if 'Item Code' in stock.columns:
+        stock['Item Code'] = stock['Item Code'].str.strip()
+    if 'Store' in stock.columns:
+        stock['Store'] = stock['Store'].astype(str).str.strip().astype('category')
+    return stock
@@ -0,0 +1,158 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from forecast_config import HORIZON_DAYS, ROOT
+
+logger = logging.getLogger(__name__)
+
+# Item catalog used to look up each stock item's category.
+CATALOG_FILE = os.environ.get(
+    "CATALOG_FILE", str(ROOT / "raw_data" / "annex1.csv"))
+
+# ---------------------------
+# Forecast Summary
+# ---------------------------
+
+SUMMARY_COLUMNS = ['product_name', 'demand', 'demand_lower', 'demand_upper']
+
+
+SEVERITY_LEVELS = ['Critical', 'Low', 'OK', 'No forecast']
+
+# stock below this share of the 30-day demand counts as critical
+CRITICAL_SHARE = 0.5
+
+
+def normalize_codes(codes):
+    return codes.astype(str).str.strip()
+
+
+def load_categories(path=CATALOG_FILE):
+    """``Category Name`` per normalized ``Item Code`` from the item catalog."""
+    try:
+        catalog = pd.read_csv(path, usecols=['Item Code', 'Category Name'],
+                              dtype={'Item Code': str})
+    except FileNotFoundError:
+        logger.warning("No item catalog at %s, categories are unknown.", path)
+        return pd.Series(dtype=object, name='category')
+    return pd.Series(catalog['Category Name'].to_numpy(),
+                     index=normalize_codes(catalog['Item Code']), name='category')
+
+
+def forecast_summary(forecasts, horizon=HORIZON_DAYS):
+    """Totals over each item's last ``horizon`` forecast days.
+
+    Returns one row per item, indexed by normalized ``Item Code``, with the
+    summed ``yhat`` (``demand``) and its lower/upper bounds. The daily
+    forecast errors are taken as independent, so the bounds are ``demand``
+    minus/plus the root sum of squares of the daily band widths (about the
+    daily width times ``sqrt(horizon)``), not the sum of the daily bounds,
+    which would widen the interval linearly with the horizon.
+    """
+    if forecasts is None or forecasts.empty:
+        summary = pd.DataFrame(
+            {name: pd.Series(dtype=float) for name in SUMMARY_COLUMNS})
+        summary['product_name'] = summary['product_name'].astype(object)
+        summary.index.name = 'Item Code'
+        return summary
+
+    data = forecasts.assign(**{'Item Code': normalize_codes(forecasts['Item Code'])})
+    # the horizon is the last ``horizon`` days of each item's forecast
+    last_day = data.groupby('Item Code', sort=False)['ds'].transform('max')
+    in_horizon = data['ds'] > last_day - pd.Timedelta(days=horizon)
+    data = data[in_horizon.to_numpy()]
+    yhat = data['yhat'].to_numpy(dtype=float)
+    below = np.clip(yhat - data['yhat_lower'].to_numpy(dtype=float), 0, None)
+    above = np.clip(data['yhat_upper'].to_numpy(dtype=float) - yhat, 0, None)
+    data = data.assign(lower_var=np.square(below), upper_var=np.square(above))
+    summary = data.groupby('Item Code', sort=True).agg(
+        product_name=('product_name', 'first'),
+        demand=('yhat', 'sum'),
+        lower_var=('lower_var', 'sum'),
+        upper_var=('upper_var', 'sum'),
+    )
+    summary['demand_lower'] = (
+        summary['demand'] - np.sqrt(summary['lower_var'])).clip(lower=0)
+    summary['demand_upper'] = summary['demand'] + np.sqrt(summary['upper_var'])
+    return summary[SUMMARY_COLUMNS]
+
+
+def inventory_summary(stock, summary, categories=None):
+    """Join the stock table with a :func:`forecast_summary`.
+
+    Keeps the stock rows in order, indexed by normalized ``Item Code``, and
+    adds the demand columns, ``has_forecast``, the ``gap`` between stock and
+    demand, the whole units of ``stock_needed`` to cover the demand, a
+    shortage ``severity`` and the item ``category`` (from ``categories``,
+    see :func:`load_categories`).
+    """
+    data = stock.copy()
+    data.columns = data.columns.str.strip()
+    data.index = pd.Index(normalize_codes(data['Item Code']), name='Item Code')
+    data = data.drop(columns='Item Code')
+
+    demand = summary[['demand', 'demand_lower', 'demand_upper']]
+    data = data.join(demand, how='left')
+    data['has_forecast'] = data['demand'].notna()
+    data[['demand', 'demand_lower', 'demand_upper']] = (
+        data[['demand', 'demand_lower', 'demand_upper']].astype(float).fillna(0))
+
+    data['gap'] = data['inventory'] - data['demand']
+    data['stock_needed'] = np.ceil(
+        (data['demand'] - data['inventory']).clip(lower=0)).astype(int)
+
+    data['severity'] = pd.Categorical(
+        np.select(
+            [~data['has_forecast'],
+             data['inventory'] < CRITICAL_SHARE * data['demand'],
+             data['inventory'] < data['demand']],
+            ['No forecast', 'Critical', 'Low'],
+            default='OK'),
+        categories=SEVERITY_LEVELS, ordered=True)
+
+    if 'category' not in data.columns:
+        if categories is None:
+            categories = load_categories()
+        data['category'] = categories.reindex(data.index).fillna('Unknown').to_numpy()
+    return data
+
+
+# ---------------------------
+# Inventory View
+# ---------------------------
+
+SORT_OPTIONS = {
+    "Shortage": (['severity', 'gap'], [True, True]),
+    "Name": (['product_name'], [True]),
+    "Inventory": (['inventory'], [True]),
+    "Prediction": (['demand'], [False]),
+}
+
+
+def filter_inventory(inventory, suppliers=None, categories=None, severities=None):
+    """Rows matching every non-empty filter."""
+    mask = np.ones(len(inventory), dtype=bool)
+    if suppliers:
+        mask &= inventory['supplier_name'].isin(suppliers).to_numpy()
+    if categories:
+        mask &= inventory['category'].isin(categories).to_numpy()
+    if severities:
+        mask &= inventory['severity'].isin(severities).to_numpy()
+    return inventory[mask]
+
+
+def sort_inventory(inventory, by="Shortage"):
+    columns, ascending = SORT_OPTIONS[by]
+    return inventory.sort_values(columns, ascending=ascending, kind='stable')
+
+
+def page_count(inventory, page_size):
+    return max(1, -(-len(inventory) // page_size))
+
+
+def inventory_page_rows(inventory, page, page_size):
+    """Rows of the 1-based ``page``."""
+    start = (page - 1) * page_size
+    return inventory.iloc[start:start + page_size]
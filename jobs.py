@@ -0,0 +1,182 @@
+import functools
+import hashlib
+import importlib.util
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from forecast_config import FORECAST_BACKEND, FORECAST_MODE, MODEL_CONFIG
+from forecast_table import ForecastTable, shared_table
+from sales_store import daily_sales_store
+from timing import span
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Finished jobs kept in the registry so other sessions can reuse them.
+MAX_FINISHED_JOBS = 8
+
+# Modules whose code shapes the forecast rows. Memory-mapped tables are
+# keyed by their source too, so an upgrade doesn't serve old forecasts.
+FORECAST_MODULES = ["forecast", "batch_forecast", "hierarchy", "preprocess",
+                    "forecast_config"]
+
+
+@functools.lru_cache(maxsize=None)
+def settings_digest():
+    """Short hash of the forecast settings and code, fixed per process."""
+    digest = hashlib.sha256(json.dumps(
+        [FORECAST_BACKEND, FORECAST_MODE, MODEL_CONFIG], sort_keys=True).encode("utf-8"))
+    for name in FORECAST_MODULES:
+        # located, not imported: importing forecast would load Prophet
+        with open(importlib.util.find_spec(name).origin, "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()[:16]
+
+
+class ForecastJob:
+    """Forecasts one sales frame in a background thread.
+
+    Forecasts are collected as each item lands, so callers can render
+    partial results while the rest of the catalog is still being fitted.
+    """
+
+    def __init__(self, key, df2):
+        self.key = key
+        self._df2 = df2
+        self._lock = threading.Lock()
+        self._forecasts = {}
+        self._table = None
+        self._completed = 0
+        self._total = None
+        self._done = False
+        self.error = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"forecast-{key[:8]}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            # deferred so importing the app doesn't load Prophet
+            from forecast import iter_predictions
+
+            with span("jobs.forecast_job", job=self.key[:8]):
+                for position, total, forecast in iter_predictions(self._df2):
+                    with self._lock:
+                        self._total = total
+                        self._completed += 1
+                        if forecast is not None:
+                            self._forecasts[position] = forecast
+        except Exception as e:
+            logger.exception("Forecast job %s failed.", self.key)
+            self.error = str(e)
+        finally:
+            with self._lock:
+                if self._total is None:
+                    self._total = self._completed
+                self._done = True
+                self._df2 = None
+
+    def progress(self):
+        """``(completed, total, done)``; ``total`` is ``None`` until known."""
+        with self._lock:
+            return self._completed, self._total, self._done
+
+    def table(self):
+        """Forecasts that have landed so far, in item order.
+
+        A :class:`~forecast_table.ForecastTable` shared by every session
+        watching this job, rebuilt only when more items have landed. Once
+        the job is done it is memory-mapped if ``FORECAST_MEMMAP_DIR`` is set,
+        unless some items failed: a later job over the same data should get
+        to retry those rather than read this table.
+        """
+        with self._lock:
+            state = (self._completed, self._done)
+            if self._table is not None and self._table[0] == state:
+                return self._table[1]
+            frames = [self._forecasts[position]
+                      for position in sorted(self._forecasts)]
+            complete = self.error is None and len(frames) == self._completed
+        forecasts = ForecastTable.from_frames(frames)
+        if state[1] and complete:
+            forecasts = shared_table(forecasts, f"{self.key}-{settings_digest()}")
+        with self._lock:
+            self._table = (state, forecasts)
+            if state[1]:
+                # the packed table is all anyone reads from now on
+                self._forecasts = {}
+        return forecasts
+
+
+# ---------------------------
+# Job Registry
+# ---------------------------
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def start_forecast_job(key, df2):
+    """Return the job forecasting the sales frame ``key``, starting one if needed.
+
+    ``key`` is the content digest of ``df2``; sessions that upload the same
+    data share a single job.
+    """
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is not None and job.error is None:
+            _jobs.move_to_end(key)
+            return job
+
+        job = ForecastJob(key, df2).start()
+        _jobs[key] = job
+
+        finished = [old_key for old_key, old_job in _jobs.items()
+                    if old_job.progress()[2]]
+        for old_key in finished[:-MAX_FINISHED_JOBS or None]:
+            del _jobs[old_key]
+        return job
+
+
+# ---------------------------
+# Sales Store Writes
+# ---------------------------
+
+# Sales frames this process has stored, or is storing, in the daily store.
+_stored = set()
+
+
+def store_sales(key, df2):
+    """Append the sales frame ``key`` to the daily sales store in the background.
+
+    Merging into the store rewrites every partition the upload touches and
+    may wait for another writer's lock, which takes far longer than parsing
+    the upload, so it runs in its own thread. A frame this process already
+    stored is skipped. Returns the thread, or ``None`` when skipped.
+    """
+    with _jobs_lock:
+        if key in _stored:
+            return None
+        _stored.add(key)
+    thread = threading.Thread(target=_store_sales, args=(key, df2),
+                              name=f"store-{key[:8]}", daemon=True)
+    thread.start()
+    return thread
+
+
+def _store_sales(key, df2):
+    try:
+        with span("jobs.store_sales", job=key[:8], rows=len(df2)):
+            daily_sales_store().append(df2)
+    except Exception:
+        logger.exception("Storing sales %s failed.", key)
+        with _jobs_lock:
+            _stored.discard(key)    # let a later upload try again
@@ -0,0 +1,380 @@
+import json
+
+import pandas as pd
+import streamlit as st
+
+from caching import (artifact_forecasts, content_digest, frame_digest, figures,
+                     parse_sales, parse_stock, price_index)
+from forecast_config import STORE_COLUMN
+from forecast_table import ForecastTable
+from inventory import (SEVERITY_LEVELS, SORT_OPTIONS, filter_inventory,
+                       forecast_summary, inventory_page_rows, inventory_summary,
+                       page_count, sort_inventory)
+from jobs import start_forecast_job, store_sales
+from plots import WINDOWS
+from pricing import unit_costs
+from replenishment import purchase_orders, replenishment_plan, supplier_orders
+from sales_store import daily_sales_store, load_daily_sales
+from timing import TIMING_LOG, recent_spans, span, spans_jsonl
+
+# ---------------------------
+# Stores
+# ---------------------------
+
+
+def store_options():
+    """Stores of the uploaded stock and sales, empty for single-store data."""
+    stores = set()
+    for df in (st.session_state.df1, st.session_state.df2):
+        if df is not None and STORE_COLUMN in df.columns:
+            stores.update(df[STORE_COLUMN].dropna().astype(str))
+    return sorted(stores)
+
+
+def store_view(df):
+    """Rows of ``df`` for the selected store (all of them without stores)."""
+    if df is None or STORE_COLUMN not in df.columns or st.session_state.store is None:
+        return df
+    return df[(df[STORE_COLUMN].astype(str) == st.session_state.store).to_numpy()]
+
+
+def store_forecasts():
+    """The selected store's forecast rows, unpacked from the shared table."""
+    return st.session_state.forecasts.to_frame(st.session_state.store)
+
+
+def refresh_summary():
+    """Recompute the selected store's forecast totals."""
+    forecasts = store_forecasts()
+    with span("app.forecast_summary", items=st.session_state.forecast_items):
+        st.session_state.forecast_summary = forecast_summary(forecasts)
+    st.session_state.inventory = None
+
+
+# ---------------------------
+# Background Forecast
+# ---------------------------
+
+
+def sync_forecasts():
+    """Pull the forecasts that have landed since the last rerun."""
+    job = st.session_state.forecast_job
+    if job is None:
+        return
+    completed, _, _ = job.progress()
+    if completed == st.session_state.forecast_items:
+        return
+    st.session_state.forecasts = job.table()
+    st.session_state.forecast_items = completed
+    # per-item 30-day totals, looked up by the panels below
+    refresh_summary()
+
+
+def use_artifact(sales_digest=None):
+    """Show the forecasts precomputed by the latest forecast_cli.py run.
+
+    With ``sales_digest``, only if the run forecast that sales data.
+    Returns ``False`` when there is no such run or it can't be read.
+    """
+    manifest = st.session_state.artifact
+    if manifest is None or sales_digest not in (None, manifest.get("sales_digest")):
+        return False
+    forecasts = artifact_forecasts(manifest)
+    if forecasts is None:
+        return False
+    st.session_state.forecast_job = None
+    st.session_state.forecasts = forecasts
+    st.session_state.forecast_items = len(forecasts.items)
+    refresh_summary()
+    return True
+
+
+def forecast_progress():
+    job = st.session_state.forecast_job
+    completed, total, done = job.progress()
+    if job.error:
+        st.error(f"Forecast failed: {job.error}")
+    elif done:
+        st.caption(f"Forecast ready for {total} item(s).")
+    else:
+        st.progress(completed / total if total else 0.0,
+                    text=f"Forecasting... {completed}/{total or '?'} items")
+    # rerun the whole app only when new items have landed
+    if completed != st.session_state.forecast_items:
+        st.rerun()
+
+
+def timing_panel():
+    """Recent spans and per-span aggregates, for finding slow reruns."""
+    spans = recent_spans()
+    if not spans:
+        st.caption("No timings recorded yet.")
+        return
+    timings = pd.DataFrame(spans)
+    stats = timings.groupby("name")["ms"].agg(
+        count="count", mean="mean", p95=lambda ms: ms.quantile(0.95),
+        max="max").sort_values("p95", ascending=False)
+    st.dataframe(stats.round(1))
+    st.dataframe(timings.tail(50).iloc[::-1], hide_index=True)
+    st.download_button("Download timings (.jsonl)", spans_jsonl(),
+                       file_name="timings.jsonl", mime="application/json")
+    # spans only reach the server's disk through the TIMING_LOG setting
+    if TIMING_LOG:
+        st.caption(f"Also logging to {TIMING_LOG}")
+
+
+# ---------------------------
+# Inputting CSV
+# ---------------------------
+
+
+def home_page():
+    success = 0
+    st.write("## Home Page")
+    with st.container():
+        # Input CSV
+        if st.session_state.df1 is None:
+            stock_csv = st.file_uploader(
+                "Import This Month's Stock (.csv)", type="csv")
+            if stock_csv is not None:
+                content = stock_csv.getvalue()
+                with span("app.parse_stock", bytes=len(content)):
+                    st.session_state.df1 = parse_stock(
+                        content_digest(content), content)
+                st.session_state.file_name = stock_csv.name
+                st.session_state.inventory = None
+
+        if st.session_state.df2 is None:
+            sales_csv = st.file_uploader(
+                "Import This Month's Sales (.csv or .parquet)",
+                type=["csv", "parquet"])
+            store = daily_sales_store()
+            if sales_csv is not None:
+                # daily totals per item, streamed in chunks and cached
+                # by file content for every session
+                content = sales_csv.getvalue()
+                st.session_state.sales_digest = content_digest(content)
+                with span("app.parse_sales", bytes=len(content)):
+                    (st.session_state.df2,
+                     st.session_state.selling_prices) = parse_sales(
+                        st.session_state.sales_digest, content)
+                st.session_state.sales_name = sales_csv.name
+                # keep the history so later sessions can skip the upload;
+                # written in the background so the upload returns now
+                store_sales(st.session_state.sales_digest, st.session_state.df2)
+            elif store.exists() and st.button("Load Stored Sales History"):
+                st.session_state.df2 = load_daily_sales()
+                st.session_state.sales_digest = frame_digest(
+                    st.session_state.df2)
+                st.session_state.sales_name = "stored sales history"
+                # the store keeps daily quantities only, not selling prices
+                st.session_state.selling_prices = None
+
+            # skip fitting when the nightly forecast_cli.py run already
+            # forecast this exact sales data
+            if st.session_state.df2 is not None and not use_artifact(
+                    st.session_state.sales_digest):
+                # Real Forecast, fitted in the background; results show up
+                # through sync_forecasts as each item lands
+                st.session_state.forecast_job = start_forecast_job(
+                    st.session_state.sales_digest, st.session_state.df2)
+                st.session_state.forecast_items = 0
+                st.session_state.forecasts = ForecastTable.from_frame(None)
+                st.session_state.forecast_summary = forecast_summary(None)
+                st.session_state.inventory = None
+                sync_forecasts()
+
+        if st.session_state.df1 is not None:
+            st.success(f"Successfully Uploaded File: {
+                       st.session_state.file_name}")
+            st.toast("Successfully Uploaded!", icon="✅", duration=1)
+            success += 1
+        if st.session_state.df2 is not None:
+            st.success(f"Successfully Uploaded File: {
+                       st.session_state.sales_name}")
+            st.toast("Successfully Uploaded!", icon="✅", duration=1)
+            success += 1
+
+        if success == 2:
+            st.set_page_config(layout="wide")
+
+    # a multi-store file was just uploaded: pick its first store
+    stores = store_options()
+    if stores and st.session_state.store not in stores:
+        st.rerun()
+
+    st.divider()
+
+    # ---------------------------
+    # Showing Data
+    # ---------------------------
+
+    stock_col, plot_col = st.columns([1, 1], gap="medium")
+    # everything below is about the store picked in the sidebar
+    store = st.session_state.store
+    df1 = store_view(st.session_state.df1)
+    df2 = store_view(st.session_state.df2)
+    with span("app.store_forecasts", rows=len(st.session_state.forecasts)):
+        forecasts = store_forecasts()
+
+    if df1 is not None and st.session_state.inventory is None:
+        with span("app.inventory_summary"):
+            st.session_state.inventory = inventory_summary(
+                df1, st.session_state.forecast_summary)
+    inventory = st.session_state.inventory
+
+    with (stock_col.container(border=True, height=1000),
+          span("app.inventory_panel")):
+        st.title("Current Month's Inventory")
+        if df1 is None:
+            st.warning("You need to upload this month's (.csv) file.")
+        else:
+            # filter / sort / page before building any widgets, so only
+            # one page of rows is rendered per rerun
+            f_supp, f_cat, f_sev = st.columns(3)
+            suppliers = f_supp.multiselect(
+                "Supplier", sorted(inventory["supplier_name"].dropna().unique()),
+                key="inv_suppliers")
+            categories = f_cat.multiselect(
+                "Category", sorted(inventory["category"].unique()),
+                key="inv_categories")
+            severities = f_sev.multiselect(
+                "Shortage", SEVERITY_LEVELS, key="inv_severities")
+            view = filter_inventory(inventory, suppliers, categories, severities)
+
+            s_sort, s_size, s_page = st.columns(3)
+            sort_by = s_sort.selectbox("Sort by", list(SORT_OPTIONS),
+                                       key="inv_sort")
+            page_size = s_size.selectbox("Rows per page", [10, 25, 50],
+                                         key="inv_page_size")
+            pages = page_count(view, page_size)
+            # the page lives in session state only (no widget default), so
+            # clamping it after a filter change doesn't trip Streamlit
+            if st.session_state.get("inv_page", 1) > pages:
+                st.session_state.inv_page = pages
+            page_no = s_page.number_input("Page", min_value=1, max_value=pages,
+                                          step=1, key="inv_page")
+            st.caption(f"{len(view)} item(s), page {page_no} of {pages}")
+            view = inventory_page_rows(sort_inventory(view, sort_by),
+                                       page_no, page_size)
+
+            with st.container(border=True):
+                rows = view.to_dict("records")
+                for p_id, row in zip(view.index, rows):
+                    p_name = row["product_name"]
+                    curr_stock = row["inventory"]
+                    pred_value = int(row["demand"])
+
+                    with st.container(horizontal=True, border=True):
+                        c_name, c_currstock, c_pred, c_suppname, c_button = st.columns([
+                                                                                       1, 1, 1, 1, 1])
+                    with c_name:
+                        st.write(f"#### {p_name}")
+                        st.caption(f"ID: {p_id}")
+
+                    with c_currstock:
+                        diff = (curr_stock - pred_value)
+                        st.metric("Inventory", curr_stock, diff)
+                    with c_pred:
+                        st.metric("Prediction", pred_value)
+                    with c_suppname:
+                        st.write(row["supplier_name"])
+                        st.caption("Supplier")
+                    with c_button:
+                        if st.button("Select", key=f"select_{p_id}"):
+                            st.session_state.selected_item = p_name
+
+    with plot_col.container(border=True):
+        st.title("Item Sale's Plot")
+        if df2 is None:
+            st.warning("You need to upload this month's (.csv) file.")
+        else:
+            product_list = df2["product_name"].unique().tolist()
+
+            default_index = (
+                product_list.index(st.session_state.selected_item) if st.session_state.selected_item in product_list
+                else 0
+            )
+
+            p_select, p_window = st.columns([3, 1])
+            st.session_state.selected_item = p_select.selectbox(
+                "Choose A Product", product_list, index=default_index)
+            window = p_window.selectbox("Window", list(WINDOWS), key="plot_window")
+            # cached figure JSON per product and window; the per-product
+            # series behind it are built once per forecast update
+            with span("app.figures", product=st.session_state.selected_item,
+                      window=window):
+                fig, pred_fig = figures(
+                    f"{st.session_state.sales_digest}:{store}",
+                    st.session_state.forecast_items,
+                    st.session_state.selected_item, WINDOWS[window], df2,
+                    forecasts)
+            if fig is not None and pred_fig is not None:
+                st.plotly_chart(json.loads(fig), use_container_width=True)
+
+                st.plotly_chart(json.loads(pred_fig), use_container_width=True)
+
+    st.divider()
+    # ---------------------------
+    # Export CSV
+    # ---------------------------
+    st.title("Export to CSV")
+    col1, col2 = st.columns(2)
+
+    if inventory is None:
+        st.warning("You need to upload this month's (.csv) file.")
+        return
+
+    # order quantities per Item Code, grouped into one order per supplier
+    # and priced at the projected annex3 wholesale prices
+    with span("app.replenishment"):
+        plan = replenishment_plan(inventory)
+        costs = unit_costs(forecasts, price_index(),
+                           st.session_state.selling_prices)
+        export_df = purchase_orders(plan, costs)
+    csv_data = export_df.to_csv(index=False).encode("utf-8")
+    suffix = "" if store is None else f"_{store}"
+
+    # if col1.button("Export Predicted Stock Needed"):
+    #     try:
+    #         st.success("Published ALERT_ON")
+    #     except Exception as e:
+    #         st.error(f"Publish failed: {e}")
+
+    with col1:
+        st.download_button(
+            label="Export Predicted Stock Needed",
+            data=csv_data,
+            file_name=f"predicted_stock_needed{suffix}.csv",
+            mime="text/csv"
+        )
+        st.caption("Projected cost and margin per supplier order (RMB)")
+        st.dataframe(supplier_orders(export_df).round(2))
+        for supplier, lines in export_df.groupby("supplier_name"):
+            st.download_button(
+                label=f"Purchase Order: {supplier}",
+                data=lines.to_csv(index=False).encode("utf-8"),
+                file_name=f"purchase_order_{supplier}{suffix}.csv",
+                mime="text/csv",
+                key=f"po_{supplier}"
+            )
+
+    with col2:
+        st.dataframe(export_df, hide_index=True)
+
+
+def inventory_page():
+    st.write("## Raw CSV")
+    df1 = st.session_state.df1
+    df2 = st.session_state.df2
+    if df1 is not None:
+        st.success(f"Successfully Uploaded File: {st.session_state.file_name}")
+        st.write(df1)
+    else:
+        st.warning("No CSV uploaded yet!")
+    if df2 is not None:
+        st.success(f"Successfully Uploaded File: {
+                   st.session_state.sales_name}")
+        st.write(df2)
+    else:
+        st.warning("No CSV uploaded yet!")
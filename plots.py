@@ -0,0 +1,188 @@
+import os
+
+import numpy as np
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Points per trace sent to the browser; longer series are downsampled.
+PLOT_MAX_POINTS = int(os.environ.get("PLOT_MAX_POINTS", 400))
+
+# Traces with more points than this are drawn as lines only.
+MARKER_POINTS = 90
+
+# Chart windows offered in the UI, in days (None = the whole history).
+WINDOWS = {"30 days": 30, "90 days": 90, "1 year": 365, "All": None}
+
+BAND_COLOR = "rgba(99, 110, 250, 0.2)"
+
+
+# ---------------------------
+# Downsampling
+# ---------------------------
+
+def lttb(x, y, threshold=PLOT_MAX_POINTS):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps.
+
+    Keeps the first and last point and, from each of ``threshold - 2``
+    equal buckets in between, the point forming the largest triangle with
+    the previously kept point and the next bucket's average, so peaks and
+    dips survive the downsampling.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(area.argmax())
+        kept[bucket + 1] = previous
+    return kept
+
+
+# ---------------------------
+# Per-Product Series
+# ---------------------------
+
+def _split_by_product(data, columns):
+    """``{product: {column: array}}`` from a frame sorted by product name."""
+    if data.empty:
+        return {}
+    names = data['product_name'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]])
+    ends = np.r_[starts[1:], len(names)]
+    arrays = {column: data[column].to_numpy() for column in columns}
+    return {names[start]: {column: values[start:end]
+                           for column, values in arrays.items()}
+            for start, end in zip(starts, ends)}
+
+
+def product_series(df2, forecasts):
+    """Daily sales and forecast arrays per product name, built once.
+
+    Returns ``(sales, predictions)``: ``sales[product]`` has ``Date`` and
+    ``Quantity Sold (kilo)``, ``predictions[product]`` has ``ds``, ``yhat``,
+    ``yhat_lower`` and ``yhat_upper``, all as date-sorted NumPy arrays.
+    """
+    sales = (
+        df2.assign(Date=df2['Date'].to_numpy(dtype='datetime64[ns]'),
+                   product_name=df2['product_name'].astype(str))
+        .groupby(['product_name', 'Date'], sort=True)['Quantity Sold (kilo)']
+        .sum().reset_index()
+    )
+    sales = _split_by_product(sales, ['Date', 'Quantity Sold (kilo)'])
+
+    columns = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+    if forecasts is None or 'product_name' not in forecasts.columns:
+        return sales, {}
+    predictions = forecasts.assign(
+        ds=forecasts['ds'].to_numpy(dtype='datetime64[ns]'),
+        product_name=forecasts['product_name'].astype(str),
+    ).sort_values(['product_name', 'ds'], kind='stable')
+    return sales, _split_by_product(predictions, columns)
+
+
+def _window(dates, days):
+    """Mask of the last ``days`` days of ``dates`` (all of them for None)."""
+    if days is None or not len(dates):
+        return np.ones(len(dates), dtype=bool)
+    return dates >= dates[-1] - np.timedelta64(days, 'D')
+
+
+def _line(go, x, y, name, **options):
+    mode = "lines+markers" if len(x) <= MARKER_POINTS else "lines"
+    return go.Scattergl(x=x, y=y, mode=mode, name=name, **options)
+
+
+# ---------------------------
+# Item Sale's Plot
+# ---------------------------
+
+def product_figures(series, product, days=30, max_points=PLOT_MAX_POINTS):
+    """Build the daily sales and prediction figures for ``product``.
+
+    ``series`` comes from :func:`product_series`. Both charts show the last
+    ``days`` days (of sales, and of the forecast) as WebGL traces with at
+    most ``max_points`` points each (see :func:`lttb`). Returns
+    ``(fig, pred_fig)``; either is ``None`` when there is nothing to plot.
+    """
+    import plotly.graph_objs as go
+
+    fig = None
+    pred_fig = None
+    sales, predictions = series
+
+    # Real Sales Plot
+    item_sales = sales.get(product)
+    if item_sales is not None:
+        dates = item_sales['Date']
+        quantity = item_sales['Quantity Sold (kilo)']
+        in_window = _window(dates, days)
+        dates, quantity = dates[in_window], quantity[in_window]
+        kept = lttb(dates.astype(np.int64), quantity, max_points)
+
+        fig = go.Figure()
+        fig.add_trace(_line(go, dates[kept], quantity[kept], f"{product} Sales"))
+        fig.update_layout(
+            title=f"Daily Sales for {product}",
+            xaxis=dict(title="Date"),
+            yaxis=dict(title="Sales (units)"),
+            height=520,
+            legend=dict(
+                orientation="h",
+                yanchor="top",
+                y=-0.3,
+                xanchor="center",
+                x=0.5,
+            )
+        )
+
+    # Predicted Sales Plot
+    prediction = predictions.get(product)
+    if prediction is not None:
+        in_window = _window(prediction['ds'], days)
+        ds = prediction['ds'][in_window]
+        yhat = prediction['yhat'][in_window]
+        kept = lttb(ds.astype(np.int64), yhat, max_points)
+
+        pred_fig = go.Figure()
+        # 80% interval as a filled band, sampled at the same days as yhat
+        pred_fig.add_trace(go.Scattergl(
+            x=ds[kept], y=prediction['yhat_upper'][in_window][kept],
+            mode="lines", line=dict(width=0), showlegend=False,
+            hoverinfo="skip"))
+        pred_fig.add_trace(go.Scattergl(
+            x=ds[kept], y=prediction['yhat_lower'][in_window][kept],
+            mode="lines", line=dict(width=0), fill="tonexty",
+            fillcolor=BAND_COLOR, name="Prediction interval"))
+        pred_fig.add_trace(_line(go, ds[kept], yhat[kept],
+                                 f"{product} Predicted Sales"))
+
+        # compare to Real (the same days as the sales chart)
+        if fig is not None:
+            pred_fig.add_trace(fig.data[0])
+
+        pred_fig.update_layout(
+            title=f"Daily Prediction Sales for {product}",
+            xaxis=dict(title="Date"),
+            yaxis=dict(title="Sales (units)"),
+            height=520
+        )
+
+    return fig, pred_fig
+
+
+def figure_json(fig):
+    return None if fig is None else fig.to_json()
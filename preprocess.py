@@ -0,0 +1,188 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+MIN_HISTORY_DAYS = 2
+
+# Raw transaction columns used by the cleaning stage when a file has them.
+RETURN_COLUMN = 'Sale or Return'
+DISCOUNT_COLUMN = 'Discount (Yes/No)'
+# Daily kilos sold at a discount, kept next to 'Quantity Sold (kilo)'.
+DISCOUNTED_COLUMN = 'Discounted (kilo)'
+
+# Outlier days are clipped to the rolling median +/- SALES_CLIP_MAD scaled
+# MADs over a centered SALES_CLIP_WINDOW-day window (0 turns clipping off).
+SALES_CLIP_WINDOW = int(os.environ.get("SALES_CLIP_WINDOW", 15))
+SALES_CLIP_MAD = float(os.environ.get("SALES_CLIP_MAD", 5.0))
+
+# Give items with discounted sales a ``discount`` regressor (the share of
+# the day's kilos sold at a discount; 0 over the forecast horizon).
+DISCOUNT_REGRESSOR = os.environ.get(
+    "DISCOUNT_REGRESSOR", "1").lower() not in ("0", "false", "no")
+
+# MAD -> standard deviation for normally distributed data
+MAD_SCALE = 1.4826
+
+
+# ---------------------------
+# Preprocessing
+# ---------------------------
+
+def net_returns(quantity, kind):
+    """``quantity`` with return rows counted negative, whatever their sign."""
+    is_return = kind.astype(str).str.strip().str.lower().eq('return').to_numpy()
+    return quantity.where(~is_return, -quantity.abs())
+
+
+def discounted_quantity(quantity, flag):
+    """Kilos sold at a discount: the sold ``quantity`` where ``flag`` is Yes."""
+    is_discount = flag.astype(str).str.strip().str.lower().eq('yes').to_numpy()
+    return quantity.clip(lower=0).where(is_discount, 0)
+
+
+def clean_sales(df):
+    """Normalize column names and types of a raw sales frame.
+
+    Transaction-level frames also get their returns netted out and, from
+    the discount flag, a ``DISCOUNTED_COLUMN``.
+    """
+    data = df.copy()
+    # normalize column names (strip spaces)
+    data.columns = data.columns.str.strip()
+
+    # ensure types
+    data['Item Code'] = data['Item Code'].astype('string').str.strip()
+    data['Date'] = pd.to_datetime(data['Date'], errors='coerce')
+    data['Quantity Sold (kilo)'] = pd.to_numeric(
+        data['Quantity Sold (kilo)'], errors='coerce')
+    if RETURN_COLUMN in data.columns:
+        data['Quantity Sold (kilo)'] = net_returns(
+            data['Quantity Sold (kilo)'], data[RETURN_COLUMN])
+    if DISCOUNT_COLUMN in data.columns and DISCOUNTED_COLUMN not in data.columns:
+        data[DISCOUNTED_COLUMN] = discounted_quantity(
+            data['Quantity Sold (kilo)'], data[DISCOUNT_COLUMN])
+    return data
+
+
+def _aggregate_daily(data):
+    columns = ['Quantity Sold (kilo)']
+    if DISCOUNTED_COLUMN in data.columns:
+        columns.append(DISCOUNTED_COLUMN)
+    return (
+        data.groupby(['Item Code', 'Date'], sort=True)[columns].sum()
+        .reset_index()
+    )
+
+
+def daily_item_sales(df):
+    """Total ``Quantity Sold (kilo)`` per (``Item Code``, ``Date``).
+
+    One groupby over the whole table; rows with an invalid date are dropped.
+    The result is sorted by item code and date.
+    """
+    return _aggregate_daily(clean_sales(df))
+
+
+# ---------------------------
+# Outlier Clipping
+# ---------------------------
+
+def clip_outliers(daily, window=None, threshold=None,
+                  column='Quantity Sold (kilo)', keep=None):
+    """Clip each item's outlier days to its rolling median +/- ``threshold`` MADs.
+
+    ``daily`` has one row per (``Item Code``, ``Date``). All items are
+    filtered at once on a (days x items) calendar matrix, with a centered
+    ``window``-day rolling median and median absolute deviation; days
+    without sales don't count towards either. Days where the MAD is 0, and
+    rows flagged in the boolean array ``keep``, are left as they are.
+    ``window`` and ``threshold`` default to ``SALES_CLIP_WINDOW`` and
+    ``SALES_CLIP_MAD``. Returns the clipped ``column`` values in ``daily``'s
+    row order.
+    """
+    window = SALES_CLIP_WINDOW if window is None else window
+    threshold = SALES_CLIP_MAD if threshold is None else threshold
+    values = daily[column].to_numpy(dtype=float)
+    if threshold <= 0 or window < 3 or daily.empty:
+        return values
+
+    days = pd.DatetimeIndex(daily['Date']).normalize()
+    first = days.min()
+    row = ((days - first) // pd.Timedelta(days=1)).to_numpy()
+    codes, col = np.unique(daily['Item Code'].to_numpy(dtype=str), return_inverse=True)
+    wide = np.full((row.max() + 1, len(codes)), np.nan)
+    wide[row, col] = values
+    wide = pd.DataFrame(wide)
+
+    min_periods = window // 2 + 1
+    median = wide.rolling(window, center=True, min_periods=min_periods).median()
+    mad = (wide - median).abs().rolling(
+        window, center=True, min_periods=min_periods).median()
+    median = median.to_numpy()[row, col]
+    bound = threshold * MAD_SCALE * mad.to_numpy()[row, col]
+
+    clip = bound > 0
+    if keep is not None:
+        clip &= ~np.asarray(keep)
+    values = values.copy()
+    values[clip] = np.clip(values[clip], median[clip] - bound[clip],
+                           median[clip] + bound[clip])
+    return values
+
+
+def item_series(df, min_rows=MIN_HISTORY_DAYS):
+    """Split a sales frame into per-item ``ds``/``y`` frames.
+
+    Returns a list of ``(item_code, product_name, frame)`` in order of first
+    appearance in ``df``. Days with a negative total are dropped, outlier
+    days are clipped (see :func:`clip_outliers`) and items with fewer than
+    ``min_rows`` days are skipped. Items with discounted sales also get a
+    ``discount`` column (see ``DISCOUNT_REGRESSOR``); their discount days
+    are not clipped, the regressor explains them.
+    """
+    data = clean_sales(df)
+    daily = _aggregate_daily(data).rename(
+        columns={'Date': 'ds', 'Quantity Sold (kilo)': 'y'})
+    daily = daily[daily['y'].notna() & (daily['y'] >= 0)]
+
+    discount = None
+    if DISCOUNT_REGRESSOR and DISCOUNTED_COLUMN in daily.columns:
+        discount = (daily[DISCOUNTED_COLUMN].to_numpy(dtype=float)
+                    / daily['y'].to_numpy(dtype=float))
+        discount = np.clip(np.nan_to_num(discount, posinf=0.0), 0, 1)
+    daily = daily.assign(y=clip_outliers(
+        daily.rename(columns={'ds': 'Date'}), column='y',
+        keep=None if discount is None else discount > 0))
+    columns = ['ds', 'y']
+    if discount is not None:
+        daily['discount'] = discount
+        columns.append('discount')
+
+    if 'product_name' in data.columns:
+        names = data.groupby('Item Code', sort=False)['product_name'].first()
+    else:
+        names = pd.Series(dtype=object)
+
+    # rows are sorted by code, so each item is one contiguous slice
+    codes = daily['Item Code'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)]
+    slices = {codes[start]: (start, end) for start, end in zip(starts, ends)}
+
+    series = []
+    for unique_code in data['Item Code'].dropna().unique():
+        if unique_code not in slices:
+            continue
+        start, end = slices[unique_code]
+        if end - start < min_rows:
+            continue
+        item_data = daily.iloc[start:end][columns].reset_index(drop=True)
+        if 'discount' in columns and not item_data['discount'].any():
+            item_data = item_data[['ds', 'y']]
+        series.append((unique_code, names.get(unique_code, unique_code), item_data))
+    return series
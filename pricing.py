@@ -0,0 +1,179 @@
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from forecast_config import HORIZON_DAYS, ROOT
+from inventory import normalize_codes
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Daily wholesale prices per item (annex3).
+PRICE_FILE = os.environ.get(
+    "PRICE_FILE", str(ROOT / "raw_data" / "annex3.csv"))
+
+# Selling prices are averaged over each item's last PRICE_WINDOW_DAYS of sales.
+PRICE_WINDOW_DAYS = int(os.environ.get("PRICE_WINDOW_DAYS", 30))
+
+PRICE_COLUMN = 'Wholesale Price (RMB/kg)'
+SELLING_PRICE_COLUMN = 'Unit Selling Price (RMB/kg)'
+# Daily totals behind the selling prices: kilos sold (returns count 0) and
+# their value at the selling price.
+SOLD_COLUMN = 'Sold (kilo)'
+SALES_VALUE_COLUMN = 'Sales Value (RMB)'
+
+
+def _days(dates):
+    return np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+
+
+# ---------------------------
+# Wholesale Prices
+# ---------------------------
+
+class PriceIndex:
+    """Wholesale prices sorted by (``Item Code``, ``Date``) for as-of lookups.
+
+    Each (item, day) pair is packed into one ``int64`` key (item number in
+    the high bits, day in the low bits), so a lookup for any number of rows
+    is a single ``searchsorted`` over the sorted keys.
+    """
+
+    def __init__(self, codes, dates, prices):
+        codes = normalize_codes(pd.Series(codes)).to_numpy()
+        self.codes, code_ids = np.unique(codes, return_inverse=True)
+        keys = self._keys(code_ids, _days(dates))
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.prices = np.asarray(prices, dtype=float)[order]
+
+    @staticmethod
+    def _keys(code_ids, days):
+        return (code_ids.astype(np.int64) << 32) + (days + (1 << 31))
+
+    @classmethod
+    def from_frame(cls, prices):
+        prices = prices.dropna(subset=['Item Code', 'Date', PRICE_COLUMN])
+        return cls(prices['Item Code'], pd.to_datetime(prices['Date']),
+                   prices[PRICE_COLUMN])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def asof(self, codes, dates):
+        """Latest price on or before each (``codes[i]``, ``dates[i]``).
+
+        ``NaN`` for unknown items and for dates before an item's first price.
+        """
+        codes = normalize_codes(pd.Series(codes)).to_numpy()
+        result = np.full(len(codes), np.nan)
+        if not len(self.codes) or not len(codes):
+            return result
+
+        code_ids = np.searchsorted(self.codes, codes)
+        known = code_ids < len(self.codes)
+        known[known] = self.codes[code_ids[known]] == codes[known]
+
+        keys = self._keys(code_ids, _days(dates))
+        position = np.searchsorted(self.keys, keys, side='right') - 1
+        # the match must be the same item, not the tail of the previous one
+        found = known & (position >= 0)
+        found[found] = (self.keys[position[found]] >> 32) == code_ids[found]
+        result[found] = self.prices[position[found]]
+        return result
+
+
+def load_price_index(path=PRICE_FILE):
+    """Wholesale prices from an annex3 CSV or ``.parquet`` file.
+
+    A missing file gives an empty index (margins show as unknown); a file
+    that cannot be read raises instead of being taken for no prices.
+    """
+    columns = ['Date', 'Item Code', PRICE_COLUMN]
+    try:
+        if Path(path).suffix == '.parquet':
+            prices = pd.read_parquet(path, columns=columns)
+            prices['Item Code'] = prices['Item Code'].astype(str)
+        else:
+            prices = pd.read_csv(path, usecols=columns,
+                                 dtype={'Item Code': str}, encoding='utf-8-sig')
+    except FileNotFoundError:
+        logger.warning("No price file at %s, margins are unknown.", path)
+        prices = pd.DataFrame(columns=columns)
+    return PriceIndex.from_frame(prices)
+
+
+# ---------------------------
+# Selling Prices
+# ---------------------------
+
+def selling_prices(daily, window_days=PRICE_WINDOW_DAYS):
+    """Quantity-weighted selling price per item over its last ``window_days``.
+
+    ``daily`` has ``SOLD_COLUMN`` and ``SALES_VALUE_COLUMN`` totals per
+    (``Item Code``, ``Date``) and maybe other keys (e.g. ``Store``), as
+    ``ingest.read_sales(..., prices=True)`` sums them in its single pass
+    over the upload. Returns a float Series indexed by normalized
+    ``Item Code`` (empty without those columns).
+    """
+    if daily is None or SALES_VALUE_COLUMN not in daily.columns:
+        return pd.Series(dtype=float, name='selling_price')
+    daily = pd.DataFrame({
+        'Item Code': normalize_codes(daily['Item Code']),
+        'Date': daily['Date'],
+        'quantity': daily[SOLD_COLUMN].to_numpy(dtype=float),
+        'value': daily[SALES_VALUE_COLUMN].to_numpy(dtype=float),
+    })
+    last_day = daily.groupby('Item Code')['Date'].transform('max')
+    recent = daily[daily['Date'] > last_day - pd.Timedelta(days=window_days)]
+    totals = recent.groupby('Item Code')[['quantity', 'value']].sum()
+    totals = totals[totals['quantity'] > 0]
+    return (totals['value'] / totals['quantity']).rename('selling_price')
+
+
+# ---------------------------
+# Cost Projection
+# ---------------------------
+
+def unit_costs(forecasts, index, selling_prices=None, horizon=HORIZON_DAYS):
+    """Projected unit cost and selling price per item over the horizon.
+
+    Every horizon day of ``forecasts`` gets the latest wholesale price from
+    ``index`` (a :class:`PriceIndex`); ``unit_cost`` is their average
+    weighted by the forecast demand. Indexed by normalized ``Item Code``.
+    """
+    if forecasts is None or forecasts.empty:
+        costs = pd.DataFrame({'unit_cost': pd.Series(dtype=float),
+                              'selling_price': pd.Series(dtype=float)})
+        costs.index.name = 'Item Code'
+        return costs
+
+    codes = normalize_codes(forecasts['Item Code'])
+    last_day = forecasts['ds'].groupby(codes).transform('max')
+    in_horizon = (forecasts['ds'] > last_day - pd.Timedelta(days=horizon)).to_numpy()
+
+    price = index.asof(codes[in_horizon], forecasts['ds'].to_numpy()[in_horizon])
+    demand = forecasts['yhat'].to_numpy(dtype=float)[in_horizon].clip(0)
+    priced = ~np.isnan(price)
+    days = pd.DataFrame({
+        'Item Code': codes[in_horizon].to_numpy()[priced],
+        'price': price[priced],
+        'cost': price[priced] * demand[priced],
+        'demand': demand[priced],
+    }).groupby('Item Code').agg(
+        price=('price', 'mean'), cost=('cost', 'sum'), demand=('demand', 'sum'))
+    # items with no forecast demand fall back to the plain average price
+    costs = pd.DataFrame({'unit_cost': (days['cost'] / days['demand']).where(
+        days['demand'] > 0, days['price'])})
+    costs = costs.reindex(pd.Index(codes.unique(), name='Item Code').sort_values())
+
+    if selling_prices is None:
+        selling_prices = pd.Series(dtype=float)
+    costs['selling_price'] = selling_prices.reindex(costs.index).astype(float)
+    return costs
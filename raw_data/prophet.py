@@ -1,41 +1,30 @@
+import sys
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 from prophet import Prophet
 import matplotlib.pyplot as plt
 from tkinter import Tk, filedialog
 
+# reuse the app's preprocessing stage
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preprocess import item_series  # noqa: E402
+
 
 Tk().withdraw()
 file_path = filedialog.askopenfilename()
 data = pd.read_csv(file_path)
 
-# normalize column names (strip spaces)
-data.columns = data.columns.str.strip()
-
-# ensure types
-data['Item Code'] = data['Item Code'].astype('string')
-data['Date'] = pd.to_datetime(data['Date'], errors='coerce')                     # convert to datetime
-data['Quantity Sold (kilo)'] = pd.to_numeric(data['Quantity Sold (kilo)'], errors='coerce')
-
 # print(data.head())
 # print(data['Item Code'].unique())
 
-for unique_code in data['Item Code'].unique():
-    item_data = data[data['Item Code'] == unique_code].copy()
-
-    # aggregate by date
-    item_data = item_data.groupby('Date', as_index=False)['Quantity Sold (kilo)'].sum()
-
-    # drop invalid dates / negative or NaN y
-    item_data = item_data[item_data['Date'].notna()]
-    item_data = item_data[item_data['Quantity Sold (kilo)'].notna() & (item_data['Quantity Sold (kilo)'] >= 0)]
-
-    if item_data.shape[0] < 2:
-        print(f"Not enough data for {unique_code}, skipping.")
-        continue
-
-    item_data = item_data.rename(columns={'Date': 'ds', 'Quantity Sold (kilo)': 'y'})
+series = item_series(data)
+skipped = data['Item Code'].nunique() - len(series)
+if skipped:
+    print(f"Not enough data for {skipped} item(s), skipping.")
 
+for unique_code, product_name, item_data in series:
     # initialize and fit
     model = Prophet(yearly_seasonality=False, changepoint_prior_scale=0.001)
     model.add_seasonality(name='yearly', period=365.25, fourier_order=9)
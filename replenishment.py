@@ -0,0 +1,119 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from forecast_config import ROOT
+from inventory import normalize_codes
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Per-item wastage rates (annex4), used to gross up the order quantities.
+LOSS_RATE_FILE = os.environ.get(
+    "LOSS_RATE_FILE", str(ROOT / "raw_data" / "annex4.csv"))
+
+# Share of the horizon demand's upper band (demand_upper - demand, see
+# inventory.forecast_summary) held as safety stock.
+SAFETY_FACTOR = float(os.environ.get("SAFETY_FACTOR", 1.0))
+
+# Loss rates are capped so a bad row can't blow up an order.
+MAX_LOSS_RATE = 0.9
+
+PLAN_COLUMNS = ['product_name', 'supplier_name', 'inventory', 'demand',
+                'safety_stock', 'loss_rate', 'target', 'order_qty']
+
+
+def load_loss_rates(path=LOSS_RATE_FILE):
+    """Loss rate per normalized ``Item Code`` as a fraction (annex4)."""
+    try:
+        rates = pd.read_csv(path, usecols=['Item Code', 'Loss Rate (%)'],
+                            dtype={'Item Code': str}, encoding='utf-8-sig')
+    except FileNotFoundError:
+        logger.warning("No loss rates at %s, orders are not grossed up.", path)
+        return pd.Series(dtype=float, name='loss_rate')
+    loss = pd.to_numeric(rates['Loss Rate (%)'], errors='coerce') / 100
+    return pd.Series(loss.to_numpy(), index=normalize_codes(rates['Item Code']),
+                     name='loss_rate').groupby(level=0).last()
+
+
+def replenishment_plan(inventory, loss_rates=None, safety_factor=SAFETY_FACTOR):
+    """Order quantities per item for an :func:`inventory.inventory_summary`.
+
+    The target stock is the horizon demand plus ``safety_factor`` of the
+    gap up to its ``demand_upper`` bound, grossed up by the item's loss
+    rate; ``order_qty`` is the whole units missing to reach it. The bound
+    is for the horizon total (daily bands added in quadrature), so the
+    safety stock grows with the square root of the horizon. Items
+    without a forecast get no order. Keeps the summary's index and order.
+    """
+    if loss_rates is None:
+        loss_rates = load_loss_rates()
+
+    demand = inventory['demand'].to_numpy(dtype=float)
+    upper = inventory['demand_upper'].to_numpy(dtype=float)
+    on_hand = inventory['inventory'].to_numpy(dtype=float)
+    loss = loss_rates.reindex(inventory.index).to_numpy(dtype=float)
+    loss = np.clip(np.nan_to_num(loss), 0, MAX_LOSS_RATE)
+
+    safety = safety_factor * np.clip(upper - demand, 0, None)
+    target = (demand + safety) / (1 - loss)
+    order = np.ceil(np.clip(target - on_hand, 0, None))
+    order[~inventory['has_forecast'].to_numpy(dtype=bool)] = 0
+
+    return pd.DataFrame({
+        'product_name': inventory['product_name'].to_numpy(),
+        'supplier_name': inventory['supplier_name'].to_numpy(),
+        'inventory': on_hand,
+        'demand': demand,
+        'safety_stock': safety,
+        'loss_rate': loss,
+        'target': target,
+        'order_qty': order.astype(int),
+    }, index=inventory.index, columns=PLAN_COLUMNS)
+
+
+# ---------------------------
+# Purchase Orders
+# ---------------------------
+
+def purchase_orders(plan, costs=None):
+    """Order lines (``order_qty > 0``) grouped by supplier, then item code.
+
+    With ``costs`` (see :func:`pricing.unit_costs`) each line also gets its
+    purchase ``cost``, the ``revenue`` of the units left after losses at the
+    selling price, and the projected ``margin``.
+    """
+    lines = plan[plan['order_qty'].to_numpy() > 0]
+    lines = lines.reset_index().sort_values(
+        ['supplier_name', 'Item Code'], kind='stable', ignore_index=True)
+    columns = ['supplier_name', 'Item Code', 'product_name', 'order_qty']
+    if costs is None:
+        return lines[columns]
+
+    prices = costs.reindex(lines['Item Code'])
+    unit_cost = prices['unit_cost'].to_numpy(dtype=float)
+    selling_price = prices['selling_price'].to_numpy(dtype=float)
+    quantity = lines['order_qty'].to_numpy(dtype=float)
+    lines = lines[columns].assign(
+        unit_cost=unit_cost,
+        selling_price=selling_price,
+        cost=quantity * unit_cost,
+        revenue=quantity * (1 - lines['loss_rate'].to_numpy()) * selling_price,
+    )
+    lines['margin'] = lines['revenue'] - lines['cost']
+    return lines
+
+
+def supplier_orders(lines):
+    """One row per supplier: number of order lines and total quantity, plus
+    the cost, revenue and margin totals when the lines are priced."""
+    totals = {'lines': ('Item Code', 'size'), 'order_qty': ('order_qty', 'sum')}
+    for name in ['cost', 'revenue', 'margin']:
+        if name in lines.columns:
+            totals[name] = (name, lambda values: values.sum(min_count=1))
+    return lines.groupby('supplier_name', sort=True).agg(**totals)
@@ -0,0 +1,212 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+from forecast_cache import LOCK_SUFFIX, SeriesLock
+from forecast_config import ROOT
+from preprocess import DISCOUNTED_COLUMN
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+SALES_STORE_DIR = os.environ.get("SALES_STORE_DIR", str(ROOT / "sales_store"))
+
+# Hive-style directories: <root>/month=2023-01/item=102900005115793/*.parquet
+PARTITIONING = ds.partitioning(
+    pa.schema([('month', pa.string()), ('item', pa.string())]), flavor='hive')
+PARTITION_COLUMNS = ['month', 'item']
+
+# Appends are written next to the store under this prefix and then moved in.
+STAGING_PREFIX = ".staging-"
+
+
+class SalesStore:
+    """Parquet dataset of sales rows partitioned by month and item code.
+
+    ``key`` lists the columns that identify a row (e.g. ``['Item Code',
+    'Date']`` for daily totals). With a key, :meth:`append` replaces rows
+    that are already stored; without one, rows are only ever added.
+    """
+
+    def __init__(self, path=SALES_STORE_DIR, key=None):
+        self.path = Path(path)
+        self.key = key
+        # memory-map the parquet files on read
+        self.filesystem = fs.LocalFileSystem(use_mmap=True)
+
+    def exists(self):
+        return self.path.is_dir() and any(self.path.iterdir())
+
+    def _dataset(self):
+        return ds.dataset(str(self.path.resolve()), format='parquet',
+                          partitioning=PARTITIONING, filesystem=self.filesystem)
+
+    @staticmethod
+    def _normalize(df):
+        data = df.copy()
+        data.columns = data.columns.str.strip()
+        data['Item Code'] = data['Item Code'].astype(str).str.strip()
+        if 'Store' in data.columns:
+            data['Store'] = data['Store'].astype(str).str.strip()
+        data['Date'] = pd.to_datetime(data['Date'], errors='coerce')
+        data = data[data['Date'].notna()]
+        data['month'] = data['Date'].dt.strftime('%Y-%m')
+        data['item'] = data['Item Code']
+        return data
+
+    def _lock(self):
+        return SeriesLock(self.path.parent / f"{self.path.name}{LOCK_SUFFIX}")
+
+    def _staging_dirs(self):
+        return self.path.parent.glob(f"{STAGING_PREFIX}{self.path.name}-*")
+
+    def _recover(self):
+        """Finish what an interrupted :meth:`append` left behind.
+
+        Partitions it had moved aside but not yet replaced are put back,
+        then its staging directory is removed.
+        """
+        for staging in self._staging_dirs():
+            old = staging / ".old"
+            for partition in old.glob("month=*/item=*"):
+                target = self.path / partition.relative_to(old)
+                if not target.exists():
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(partition, target)
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _swap_in(self, staging, replace):
+        """Move the partitions written under ``staging`` into the store.
+
+        With ``replace`` each stored partition is swapped for the staged one
+        (moved aside first, so nothing is deleted before its replacement is
+        in place); otherwise the staged files are added to it.
+        """
+        old = staging / ".old"
+        for partition in staging.glob("month=*/item=*"):
+            relative = partition.relative_to(staging)
+            target = self.path / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if not replace and target.exists():
+                for file in partition.iterdir():
+                    os.replace(file, target / file.name)
+                continue
+            if target.exists():
+                (old / relative).parent.mkdir(parents=True, exist_ok=True)
+                os.replace(target, old / relative)
+            os.replace(partition, target)
+
+    def append(self, df):
+        """Write ``df`` (needs ``Item Code`` and ``Date`` columns) to the store.
+
+        Writers take a lock on the whole store, and rows are written to a
+        staging directory before any stored partition is touched, so a
+        failed append never loses stored rows.
+        """
+        data = self._normalize(df)
+        if data.empty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock = self._lock()
+        if not lock.acquire():
+            raise TimeoutError(f"Sales store {self.path} is locked by another writer.")
+        try:
+            self._recover()
+            if self.key and self.exists():
+                # merge with what is stored for the touched partitions, newest
+                # rows win, then rewrite those partitions as a single file each
+                touched = data[PARTITION_COLUMNS].drop_duplicates()
+                stored = self.read(items=touched['item'].unique(),
+                                   months=touched['month'].unique(),
+                                   keep_partitions=True)
+                if not stored.empty:
+                    stored = stored.merge(touched, on=PARTITION_COLUMNS)
+                    key = [name for name in self.key if name in data.columns]
+                    data = (
+                        pd.concat([stored, data], ignore_index=True)
+                        .drop_duplicates(key, keep='last')
+                    )
+
+            staging = self.path.parent / f"{STAGING_PREFIX}{self.path.name}-{uuid.uuid4().hex}"
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            ds.write_dataset(
+                table, str(staging.resolve()), format='parquet',
+                partitioning=PARTITIONING,
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                max_partitions=100_000,
+            )
+            self._swap_in(staging, replace=bool(self.key))
+            shutil.rmtree(staging)
+        finally:
+            lock.release()
+
+    def read(self, items=None, start=None, end=None, months=None,
+             columns=None, keep_partitions=False):
+        """Read stored rows, pruning partitions by item code and date range.
+
+        ``start``/``end`` are inclusive dates. Returns an empty frame when
+        the store does not exist yet.
+        """
+        if not self.exists():
+            return pd.DataFrame()
+
+        filters = []
+        if items is not None:
+            items = [str(item).strip() for item in items]
+            filters.append(ds.field('item').isin(items))
+        if months is not None:
+            filters.append(ds.field('month').isin(list(months)))
+        if start is not None:
+            start = pd.Timestamp(start)
+            filters.append(ds.field('month') >= start.strftime('%Y-%m'))
+            filters.append(ds.field('Date') >= start.to_datetime64())
+        if end is not None:
+            end = pd.Timestamp(end)
+            filters.append(ds.field('month') <= end.strftime('%Y-%m'))
+            filters.append(ds.field('Date') <= end.to_datetime64())
+
+        expression = None
+        for condition in filters:
+            expression = condition if expression is None else expression & condition
+
+        table = self._dataset().to_table(columns=columns, filter=expression)
+        data = table.to_pandas()
+        if not keep_partitions:
+            data = data.drop(columns=PARTITION_COLUMNS, errors='ignore')
+        order = [name for name in ['Store', 'Item Code', 'Date'] if name in data.columns]
+        if order:
+            data = data.sort_values(order, ignore_index=True, kind='stable')
+        return data
+
+
+def daily_sales_store(path=SALES_STORE_DIR):
+    """Store of the app's per-item daily totals (see ``ingest.read_sales``).
+
+    Rows are keyed per store when the data has a ``Store`` column.
+    """
+    return SalesStore(Path(path) / "daily", key=['Store', 'Item Code', 'Date'])
+
+
+def transactions_store(path=SALES_STORE_DIR):
+    """Append-only store of raw transaction rows for the prep scripts."""
+    return SalesStore(Path(path) / "transactions")
+
+
+def load_daily_sales(items=None, start=None, end=None, path=SALES_STORE_DIR):
+    """Daily totals from the store with the same dtypes as ``read_sales``."""
+    daily = daily_sales_store(path).read(items=items, start=start, end=end)
+    for name in ['Store', 'Item Code', 'product_name']:
+        if name in daily.columns:
+            daily[name] = daily[name].astype('category')
+    if DISCOUNTED_COLUMN in daily.columns:
+        # rows stored before discounts were tracked
+        daily[DISCOUNTED_COLUMN] = daily[DISCOUNTED_COLUMN].fillna(0)
+    return daily
@@ -0,0 +1,73 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# ---------------------------
+# Settings
+# ---------------------------
+
+# Spans kept in memory for the debug panel.
+TIMING_BUFFER_SIZE = int(os.environ.get("TIMING_BUFFER_SIZE", 1000))
+
+# When set, every span is also appended to this JSON-lines file.
+TIMING_LOG = os.environ.get("TIMING_LOG")
+
+# Process-wide buffer: background jobs, the CLI, anything without its own.
+_spans = deque(maxlen=TIMING_BUFFER_SIZE)
+_lock = threading.Lock()
+
+# Buffer of the current context (e.g. one app session's rerun). New threads
+# start without one, so background work records into ``_spans``.
+_buffer = contextvars.ContextVar("timing_buffer", default=None)
+
+
+def new_buffer():
+    """An empty span buffer, e.g. one per app session."""
+    return deque(maxlen=TIMING_BUFFER_SIZE)
+
+
+def use_buffer(buffer):
+    """Record this context's spans into ``buffer`` (``None``: process-wide)."""
+    _buffer.set(buffer)
+
+
+def _current():
+    buffer = _buffer.get()
+    return _spans if buffer is None else buffer
+
+
+def record(name, seconds, **fields):
+    """Add one finished span to the buffer (and the log, if configured)."""
+    entry = {"name": name, "start": time.time() - seconds,
+             "ms": seconds * 1000, **fields}
+    with _lock:
+        _current().append(entry)
+        if TIMING_LOG:
+            with open(TIMING_LOG, "a", encoding="utf-8") as log:
+                log.write(json.dumps(entry, default=str) + "\n")
+
+
+@contextmanager
+def span(name, **fields):
+    """Time the ``with`` block as span ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, **fields)
+
+
+def recent_spans(limit=None):
+    """Most recent spans of the current buffer, oldest first."""
+    with _lock:
+        spans = list(_current())
+    return spans if limit is None else spans[-limit:]
+
+
+def spans_jsonl(spans=None):
+    spans = recent_spans() if spans is None else spans
+    return "".join(json.dumps(entry, default=str) + "\n" for entry in spans)